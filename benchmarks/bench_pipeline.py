@@ -0,0 +1,311 @@
+"""
+Offline end-to-end latency benchmark for the transcription pipeline.
+
+Feeds audio clips through the same stages the app uses (AudioBuffer capture
+in callback-sized blocks, Transcriber.transcribe_iter, output stage) and reports
+wall-clock latency, real-time factor (RTF) and peak RSS for every
+combination of model size, compute type, beam size and thread count.
+
+Each combination runs in a fresh subprocess so peak RSS and model load time
+are measured in isolation. Results are written as JSON and can be compared
+against a previous run to catch regressions.
+
+Usage:
+    python benchmarks/bench_pipeline.py --models tiny,base --beam-sizes 1,5
+    python benchmarks/bench_pipeline.py --fixtures path/to/wavs --output run.json
+    python benchmarks/bench_pipeline.py --compare baseline.json --output run.json
+
+Fixture WAV files give realistic numbers. Without them, synthetic voiced
+audio of --durations seconds is generated; decode time on synthetic audio
+depends on what the model hallucinates, so use it only for relative checks.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024 # Typical PortAudio callback block
+
+def synthetic_clip(duration_s, seed=0):
+    """
+    Speech-like test signal: harmonic voiced tone with syllable-rate
+    amplitude modulation, short pauses and a low noise floor.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration_s * SAMPLE_RATE)) / SAMPLE_RATE
+    pitch = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 6))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    pauses = (np.sin(2 * np.pi * 0.25 * t) > -0.7).astype(np.float32)
+    audio = 0.2 * voiced * syllables * pauses + 0.003 * rng.standard_normal(t.size)
+    return audio.astype(np.float32)
+
+def load_fixture(path):
+    import scipy.io.wavfile as wav
+    from scipy.signal import resample_poly
+
+    rate, data = wav.read(path)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    if np.issubdtype(data.dtype, np.integer):
+        data = data.astype(np.float32) / np.iinfo(data.dtype).max
+    data = data.astype(np.float32)
+    if rate != SAMPLE_RATE:
+        gcd = np.gcd(rate, SAMPLE_RATE)
+        data = resample_poly(data, SAMPLE_RATE // gcd, rate // gcd).astype(np.float32)
+    return data
+
+def collect_clips(args):
+    clips = []
+    if args.fixtures:
+        for name in sorted(os.listdir(args.fixtures)):
+            if name.lower().endswith(".wav"):
+                clips.append({"name": name, "path": os.path.join(args.fixtures, name)})
+    if not clips:
+        for duration in args.durations:
+            clips.append({"name": f"synthetic_{duration:g}s", "duration": duration})
+    return clips
+
+def capture_stage(audio):
+    """
+    Replays audio through AudioBuffer the way AudioRecorder._callback does.
+    Returns (captured_view, seconds_spent).
+    """
+    from core.audio_buffer import AudioBuffer
+
+    buffer = AudioBuffer(len(audio))
+    start = time.perf_counter()
+    for offset in range(0, len(audio), BLOCK_SIZE):
+        buffer.write(audio[offset:offset + BLOCK_SIZE])
+    captured = buffer.get()
+    return captured, time.perf_counter() - start
+
+def output_stage(text, postprocessor=None):
+    """
+    Headless stand-in for AppController.on_transcription_finished: the text
+    handling that happens before clipboard/paste (which need a desktop),
+    including the dictionary post-processing stage.
+    """
+    start = time.perf_counter()
+    if postprocessor:
+        text = postprocessor.process(text)
+    text = text.strip()
+    return text, time.perf_counter() - start
+
+def run_combination(combo, clips, repeat):
+    """
+    Runs inside the child process: loads one model configuration and times
+    every clip. Returns a list of result dicts.
+    """
+    from core.config_manager import ConfigManager
+    from core.transcriber import Transcriber
+    from core.postprocess import PostProcessor
+    from core.sysinfo import get_peak_rss_mb
+
+    # Defaults held in memory only: the user's config.json must not leak in
+    with tempfile.TemporaryDirectory(prefix="ft_bench_") as config_dir:
+        config = ConfigManager(config_file=os.path.join(config_dir, "config.json"), read_only=True)
+    config.set("sample_rate", SAMPLE_RATE)
+    config.set("streaming_mode", False)
+    for key in ("model_size", "device", "compute_type", "beam_size", "cpu_threads", "language",
+                "dictionary_file", "spoken_punctuation"):
+        config.set(key, combo[key])
+    postprocessor = PostProcessor(config)
+    # Compile the dictionary outside the timed loop, as the app does at startup
+    postprocessor.refresh()
+
+    transcriber = Transcriber(config)
+    start = time.perf_counter()
+    if not transcriber.load_model():
+        raise RuntimeError(f"Failed to load model {combo['model_size']}")
+    load_s = time.perf_counter() - start
+
+    # Warm-up decode so the first clip doesn't pay one-time init costs
+    transcriber.transcribe(synthetic_clip(1.0))
+
+    results = []
+    for clip in clips:
+        audio = load_fixture(clip["path"]) if "path" in clip else synthetic_clip(clip["duration"])
+        duration = len(audio) / SAMPLE_RATE
+
+        latencies, decodes, captures, outputs = [], [], [], []
+        text = ""
+        failures, error = 0, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            captured, capture_s = capture_stage(audio)
+            decode_start = time.perf_counter()
+            try:
+                # transcribe_iter() raises; transcribe() would time an error string
+                text = "".join(transcriber.transcribe_iter(captured))
+            except Exception as e:
+                failures += 1
+                error = str(e)
+                continue
+            decode_s = time.perf_counter() - decode_start
+            text, output_s = output_stage(text, postprocessor)
+            latencies.append(time.perf_counter() - start)
+            decodes.append(decode_s)
+            captures.append(capture_s)
+            outputs.append(output_s)
+
+        if not latencies:
+            results.append(dict(combo, clip=clip["name"], failures=failures, error=error))
+            continue
+        latency_p50 = statistics.median(latencies)
+        results.append(dict(combo, **{
+            "clip": clip["name"],
+            "duration_s": round(duration, 3),
+            "load_s": round(load_s, 3),
+            "latency_s": {
+                "p50": round(latency_p50, 4),
+                "mean": round(statistics.fmean(latencies), 4),
+                "min": round(min(latencies), 4),
+                "max": round(max(latencies), 4),
+            },
+            "decode_s_p50": round(statistics.median(decodes), 4),
+            "capture_ms_p50": round(statistics.median(captures) * 1000, 3),
+            "output_ms_p50": round(statistics.median(outputs) * 1000, 3),
+            "rtf": round(latency_p50 / duration, 4) if duration else None,
+            "peak_rss_mb": round(get_peak_rss_mb() or 0, 1),
+            "text_chars": len(text),
+            "failures": failures,
+        }))
+    return results
+
+def run_child(combo, clips, repeat, timeout):
+    """
+    Runs one combination in a subprocess and returns its results.
+    """
+    payload = json.dumps({"combo": combo, "clips": clips, "repeat": repeat})
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child"],
+        input=payload, capture_output=True, text=True, timeout=timeout
+    )
+    # The child prints progress from the app modules; results are the last line
+    lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+    if proc.returncode != 0 or not lines:
+        error = (proc.stderr or proc.stdout).strip().splitlines()
+        return [dict(combo, error=error[-1] if error else f"exit code {proc.returncode}")]
+    return json.loads(lines[-1])["results"]
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints per-row latency deltas against a previous run. Returns the number
+    of rows that regressed by more than threshold (fraction).
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def row_key(r):
+        return (r.get("model_size"), r.get("device"), r.get("compute_type"),
+                r.get("beam_size"), r.get("cpu_threads"), r.get("clip"))
+
+    previous = {row_key(r): r for r in baseline.get("results", []) if "latency_s" in r}
+    regressions = 0
+    for row in results:
+        old = previous.get(row_key(row))
+        if not old or "latency_s" not in row:
+            continue
+        before, after = old["latency_s"]["p50"], row["latency_s"]["p50"]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        print(f"{'/'.join(str(k) for k in row_key(row))}: {before:.3f}s -> {after:.3f}s ({change:+.1%}){flag}")
+    return regressions
+
+def parse_list(value, cast=str):
+    return [cast(v) for v in value.split(",") if v]
+
+def main():
+    parser = argparse.ArgumentParser(description="FreeTranscriber pipeline latency benchmark")
+    parser.add_argument("--models", default="tiny,base")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-types", default="int8")
+    parser.add_argument("--beam-sizes", default="1,5")
+    parser.add_argument("--threads", default="0", help="cpu_threads values, 0 = library default")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--durations", default="5,15,30", help="Synthetic clip lengths in seconds")
+    parser.add_argument("--fixtures", help="Directory of WAV files to use instead of synthetic audio")
+    parser.add_argument("--dictionary", default="", help="Post-processing dictionary file")
+    parser.add_argument("--spoken-punctuation", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--timeout", type=int, default=1800, help="Seconds per combination")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--compare", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Regression threshold for --compare")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        job = json.loads(sys.stdin.read())
+        results = run_combination(job["combo"], job["clips"], job["repeat"])
+        print(json.dumps({"results": results}))
+        return 0
+
+    args.durations = parse_list(args.durations, float)
+    clips = collect_clips(args)
+
+    combos = [
+        {
+            "model_size": model_size,
+            "device": args.device,
+            "compute_type": compute_type,
+            "beam_size": beam_size,
+            "cpu_threads": threads,
+            "language": args.language,
+            "dictionary_file": os.path.abspath(args.dictionary) if args.dictionary else "",
+            "spoken_punctuation": args.spoken_punctuation,
+        }
+        for model_size, compute_type, beam_size, threads in itertools.product(
+            parse_list(args.models),
+            parse_list(args.compute_types),
+            parse_list(args.beam_sizes, int),
+            parse_list(args.threads, int),
+        )
+    ]
+
+    results = []
+    for combo in combos:
+        print(f"Running {combo}...", file=sys.stderr)
+        results.extend(run_child(combo, clips, args.repeat, args.timeout))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
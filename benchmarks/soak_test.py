@@ -0,0 +1,196 @@
+"""
+Headless soak test for the full app pipeline.
+
+Starts the real AppController on an offscreen Qt platform with a replay
+audio source (core.audio_source.ArraySource) instead of the microphone,
+then fires toggle_recording in record/stop cycles: capture -> queue ->
+transcribe -> output. Clipboard and paste are disabled; everything else
+(worker thread, history, tracing, streaming if enabled) runs as in the app.
+
+Per cycle it records end-to-end latency (stop -> result), RSS and thread
+count, and at the end reports drift between the first and last tenth of
+the run, so latency creep and leaks show up across hundreds of cycles.
+
+Usage:
+    python benchmarks/soak_test.py --cycles 300 --speed 4
+    python benchmarks/soak_test.py --fixture speech.wav --model tiny --output soak.json
+
+--speed replays audio faster than real time (recording durations shrink
+accordingly). The user's config.json is read but never written.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
+
+from bench_pipeline import synthetic_clip, SAMPLE_RATE
+from core.audio_source import ArraySource, FileSource
+from core.config_manager import ConfigManager
+from core.sysinfo import get_rss_mb
+from main import AppController
+
+class SoakDriver:
+    """
+    Drives record/stop cycles from the GUI thread with single-shot timers.
+    """
+
+    def __init__(self, app, controller, cycles, record_s, gap_s, wait_for_result):
+        self.app = app
+        self.controller = controller
+        self.cycles = cycles
+        self.record_s = record_s
+        self.gap_s = gap_s
+        self.wait_for_result = wait_for_result
+        self.started = 0
+        self.samples = []
+        self.stopped_at = {}
+        controller.worker.finished.connect(self.on_finished)
+        controller.worker.error.connect(self.on_error)
+
+    def start(self):
+        QTimer.singleShot(0, self.start_cycle)
+
+    def start_cycle(self):
+        if self.started >= self.cycles:
+            self.maybe_quit()
+            return
+        self.started += 1
+        self.controller.toggle_recording()
+        QTimer.singleShot(int(self.record_s * 1000), self.stop_cycle)
+
+    def stop_cycle(self):
+        self.controller.toggle_recording()
+        if not self.wait_for_result:
+            QTimer.singleShot(int(self.gap_s * 1000), self.start_cycle)
+
+    def on_finished(self, job, text):
+        self.record(job, text=text)
+
+    def on_error(self, job, message):
+        self.record(job, error=message)
+
+    def record(self, job, text=None, error=None):
+        self.samples.append({
+            "cycle": len(self.samples) + 1,
+            "latency_s": round(time.perf_counter() - job.enqueued_at, 4),
+            "wait_s": round(job.wait_s, 4),
+            "chars": len(text or ""),
+            "error": error,
+            "rss_mb": round(get_rss_mb() or 0, 1),
+            "threads": threading.active_count(),
+        })
+        if self.wait_for_result:
+            QTimer.singleShot(int(self.gap_s * 1000), self.start_cycle)
+        else:
+            self.maybe_quit()
+
+    def maybe_quit(self):
+        if len(self.samples) >= self.cycles:
+            self.app.quit()
+
+def drift(samples, key):
+    """
+    Median of the last tenth of the run minus median of the first tenth.
+    """
+    values = [s[key] for s in samples]
+    if len(values) < 10:
+        return None
+    n = max(1, len(values) // 10)
+    return round(statistics.median(values[-n:]) - statistics.median(values[:n]), 4)
+
+def main():
+    parser = argparse.ArgumentParser(description="FreeTranscriber headless soak test")
+    parser.add_argument("--cycles", type=int, default=100)
+    parser.add_argument("--record-s", type=float, default=5.0, help="Audio seconds per utterance")
+    parser.add_argument("--gap-s", type=float, default=0.2, help="Pause between cycles")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed, multiple of real time")
+    parser.add_argument("--fixture", help="16-bit WAV to replay (default: synthetic audio)")
+    parser.add_argument("--model", help="Override model_size")
+    parser.add_argument("--config", default="config.json", help="Base config (read only)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=JSON",
+                        help="Extra config override, e.g. --set streaming_mode=true")
+    parser.add_argument("--no-wait", action="store_true",
+                        help="Start the next recording without waiting for the result (queueing)")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    args = parser.parse_args()
+
+    if args.fixture:
+        source = FileSource(args.fixture, speed=args.speed)
+    else:
+        source = ArraySource(synthetic_clip(max(args.record_s, 10)), SAMPLE_RATE, speed=args.speed)
+
+    work_dir = tempfile.mkdtemp(prefix="ft_soak_")
+    config = ConfigManager(args.config, read_only=True)
+    config.set_many({
+        "copy_to_clipboard": False,
+        "type_text": False,
+        "use_sounds": False,
+        "autotune_on_first_run": False,
+        "history_file": os.path.join(work_dir, "history.db"),
+        "trace_log": os.path.join(work_dir, "latency.jsonl"),
+    })
+    if args.model:
+        config.set("model_size", args.model)
+    for item in args.set:
+        key, _, value = item.partition("=")
+        config.set(key, json.loads(value))
+
+    app = QApplication(sys.argv)
+    app.setQuitOnLastWindowClosed(False)
+    controller = AppController(app, config_manager=config, audio_source=source)
+
+    # Wall-clock time per cycle shrinks with the replay speed
+    driver = SoakDriver(app, controller, args.cycles, args.record_s / args.speed,
+                        args.gap_s, wait_for_result=not args.no_wait)
+    controller.model_loader.loaded.connect(lambda ok: driver.start() if not driver.started else None)
+
+    start = time.perf_counter()
+    app.exec()
+    elapsed = time.perf_counter() - start
+
+    samples = driver.samples
+    latencies = [s["latency_s"] for s in samples if not s["error"]]
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "cycles": args.cycles,
+            "record_s": args.record_s,
+            "speed": args.speed,
+            "model_size": config.get("model_size"),
+            "elapsed_s": round(elapsed, 1),
+            "work_dir": work_dir,
+        },
+        "summary": {
+            "errors": sum(1 for s in samples if s["error"]),
+            "latency_median_s": round(statistics.median(latencies), 4) if latencies else None,
+            "latency_max_s": max(latencies) if latencies else None,
+            "latency_drift_s": drift(samples, "latency_s"),
+            "rss_start_mb": samples[0]["rss_mb"] if samples else None,
+            "rss_end_mb": samples[-1]["rss_mb"] if samples else None,
+            "rss_drift_mb": drift(samples, "rss_mb"),
+            "threads_drift": drift(samples, "threads"),
+            "latency_stats": controller.tracer.summary(),
+        },
+        "samples": samples,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""
+Headless batch transcription.
+
+Transcribes files and/or folders of audio with a pool of worker processes,
+each loading the Whisper model once. Settings come from the app's
+config.json (via ConfigManager, never written back) and can be overridden
+on the command line.
+
+    python src/cli.py meetings/ --workers 4 --output meetings.jsonl
+    python src/cli.py a.wav b.mp3 --format text --output transcripts/
+
+Output is streamed as results arrive. Re-running with the same --output
+skips files that were already transcribed successfully (resume).
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from core.config_manager import ConfigManager
+from core.transcriber import Transcriber, MODEL_SAMPLE_RATE
+
+AUDIO_EXTENSIONS = {
+    ".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".wma",
+    ".webm", ".mp4", ".mkv", ".mov",
+}
+
+# Per-process state, set by init_worker()
+_transcriber = None
+_load_error = None
+
+def init_worker(config_file, overrides):
+    # Must not raise: Pool replaces a worker whose initializer fails with a
+    # new one, forever, and imap_unordered() never returns
+    global _transcriber, _load_error
+    # Keep the app's progress prints out of the results on stdout
+    sys.stdout = sys.stderr
+
+    config = ConfigManager(config_file, read_only=True)
+    for key, value in overrides.items():
+        config.set(key, value)
+
+    try:
+        _transcriber = Transcriber(config)
+        if not _transcriber.load_model():
+            _load_error = "Failed to load model"
+    except Exception as e:
+        _load_error = f"Failed to load model: {e}"
+
+def transcribe_file(path):
+    start = time.perf_counter()
+    result = {"path": path}
+    if _load_error:
+        result["error"] = _load_error
+        result["fatal"] = True
+        return result
+    try:
+        audio = _transcriber.load_audio_file(path)
+        result["duration_s"] = round(len(audio) / MODEL_SAMPLE_RATE, 3)
+        # transcribe_iter() raises on failure; transcribe() would return an error string
+        result["text"] = "".join(_transcriber.transcribe_iter(audio, sample_rate=MODEL_SAMPLE_RATE)).strip()
+    except Exception as e:
+        result["error"] = str(e)
+    result["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+def collect_inputs(inputs, recursive):
+    """
+    Returns (files, names): absolute paths, and for each path its name
+    relative to the input it was found under (subdirectories kept), which
+    the text format mirrors in the output directory.
+    """
+    files = []
+    names = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            if recursive:
+                walker = ((root, entries) for root, _, entries in os.walk(item))
+            else:
+                walker = [(item, os.listdir(item))]
+            found = []
+            for root, entries in walker:
+                for name in sorted(entries):
+                    if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                        found.append(os.path.join(root, name))
+            found = [(f, os.path.relpath(f, item)) for f in found]
+        elif os.path.isfile(item):
+            found = [(item, os.path.basename(item))]
+        else:
+            print(f"Skipping missing input: {item}", file=sys.stderr)
+            continue
+        for path, name in found:
+            # Absolute paths so resume works regardless of the working directory
+            path = os.path.abspath(path)
+            if path not in names:
+                files.append(path)
+                names[path] = name
+
+    # Different inputs can still yield the same name (a/rec.wav, b/rec.wav)
+    seen = {}
+    for path in files:
+        seen.setdefault(os.path.normcase(os.path.splitext(names[path])[0]), []).append(path)
+    for paths in seen.values():
+        if len(paths) > 1:
+            for path in paths:
+                stem, ext = os.path.splitext(names[path])
+                digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:8]
+                names[path] = f"{stem}-{digest}{ext}"
+    return files, names
+
+def text_output_path(output_dir, name):
+    return os.path.join(output_dir, os.path.splitext(name)[0] + ".txt")
+
+def load_done(args):
+    """
+    Files already transcribed successfully by a previous run.
+    """
+    done = set()
+    if not args.output:
+        return done
+
+    if args.format == "jsonl":
+        if os.path.exists(args.output):
+            with open(args.output, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue # Truncated last line from an interrupted run
+                    if "text" in entry:
+                        done.add(entry["path"])
+    return done
+
+class ResultWriter:
+    def __init__(self, args, names):
+        self.args = args
+        self.names = names
+        self.file = None
+        if args.format == "jsonl":
+            if args.output:
+                self.file = open(args.output, "a", encoding="utf-8")
+        elif args.output:
+            os.makedirs(args.output, exist_ok=True)
+
+    def write(self, result):
+        if self.args.format == "jsonl":
+            line = json.dumps(result, ensure_ascii=False)
+            out = self.file or sys.stdout
+            out.write(line + "\n")
+            out.flush()
+        elif "text" in result:
+            if self.args.output:
+                path = text_output_path(self.args.output, self.names[result["path"]])
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(result["text"] + "\n")
+            else:
+                print(f"== {result['path']}\n{result['text']}\n", flush=True)
+
+        if "error" in result:
+            print(f"Failed: {result['path']}: {result['error']}", file=sys.stderr)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+
+def default_threads(config_file, overrides, workers):
+    """
+    cpu_threads per decode so that all concurrent decodes share the cores:
+    each worker may decode long_form_workers chunks of a long file at once.
+    """
+    config = ConfigManager(config_file, read_only=True)
+    config.set_many(overrides)
+    decodes = workers
+    if config.get("long_form_enabled"):
+        decodes *= max(1, config.get("long_form_workers"))
+    return max(1, (os.cpu_count() or 1) // decodes)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="FreeTranscriber batch transcription")
+    parser.add_argument("inputs", nargs="+", help="Audio files and/or directories")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Descend into subdirectories")
+    parser.add_argument("-o", "--output", help="JSONL file (jsonl) or directory (text); default stdout")
+    parser.add_argument("--format", choices=["jsonl", "text"], default="jsonl")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Worker processes, each with its own model")
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="cpu_threads per decode (default: cores / concurrent decodes)")
+    parser.add_argument("--config", default="config.json", help="App config to read settings from")
+    parser.add_argument("--model", help="Override model_size")
+    parser.add_argument("--language", help="Override language (ru, en, auto)")
+    parser.add_argument("--device", help="Override device (auto, cpu, cuda)")
+    parser.add_argument("--beam-size", type=int, help="Override beam_size")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    workers = max(1, args.workers)
+
+    overrides = {"streaming_mode": False}
+    for key, value in (("model_size", args.model), ("language", args.language),
+                       ("device", args.device), ("beam_size", args.beam_size)):
+        if value is not None:
+            overrides[key] = value
+    overrides["cpu_threads"] = threads = args.threads_per_worker or default_threads(args.config, overrides, workers)
+
+    files, names = collect_inputs(args.inputs, args.recursive)
+    done = load_done(args)
+    if args.format == "text" and args.output:
+        done |= {f for f in files if os.path.exists(text_output_path(args.output, names[f]))}
+    pending = [f for f in files if f not in done]
+
+    print(f"{len(pending)} file(s) to transcribe ({len(files) - len(pending)} already done), "
+          f"{workers} worker(s) x {threads} thread(s)", file=sys.stderr)
+    if not pending:
+        return 0
+
+    writer = ResultWriter(args, names)
+    failures = 0
+    # 'spawn' on every platform: CTranslate2 state must not be forked
+    context = multiprocessing.get_context("spawn")
+    pool = context.Pool(workers, initializer=init_worker, initargs=(args.config, overrides))
+    try:
+        for index, result in enumerate(pool.imap_unordered(transcribe_file, pending), 1):
+            if result.get("fatal"):
+                # Not written, so a re-run retries every pending file
+                print(f"{result['error']}; aborting.", file=sys.stderr)
+                pool.terminate()
+                return 1
+            writer.write(result)
+            failures += "error" in result
+            print(f"[{index}/{len(pending)}] {os.path.basename(result['path'])} "
+                  f"({result['elapsed_s']}s)", file=sys.stderr)
+        pool.close()
+    except KeyboardInterrupt:
+        print("Interrupted; re-run with the same --output to resume.", file=sys.stderr)
+        pool.terminate()
+        return 130
+    finally:
+        pool.join()
+        writer.close()
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+import os
+import threading
+import time
+import uuid
+import wave
+
+import numpy as np
+
+ARCHIVE_EXTENSIONS = (".wav", ".flac")
+
+def to_int16(audio):
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype("<i2")
+
+class ArchiveWriter:
+    """
+    Encodes one recording to disk while it is being captured. A background
+    thread drains new samples from the recorder's AudioBuffer every
+    'interval' seconds, so finish() only has the last fraction of a second
+    left to write.
+    """
+
+    def __init__(self, path, buffer, sample_rate, fmt="wav", interval=0.5):
+        self.buffer = buffer
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.position = 0 # Absolute buffer index written so far
+        self._stop = threading.Event()
+
+        if fmt == "flac":
+            try:
+                import soundfile as sf
+                path = os.path.splitext(path)[0] + ".flac"
+                self._file = sf.SoundFile(path, "w", samplerate=sample_rate, channels=1,
+                                          format="FLAC", subtype="PCM_16")
+                self._write = lambda samples: self._file.write(to_int16(samples))
+            except ImportError:
+                print("soundfile not installed, archiving as 16-bit WAV")
+                fmt = "wav"
+        if fmt != "flac":
+            path = os.path.splitext(path)[0] + ".wav"
+            self._file = wave.open(path, "wb")
+            self._file.setnchannels(1)
+            self._file.setsampwidth(2)
+            self._file.setframerate(sample_rate)
+            self._write = lambda samples: self._file.writeframes(to_int16(samples).tobytes())
+        self.path = path
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._drain()
+
+    def _drain(self, end=None):
+        end = self.buffer.total_written if end is None else end
+        if end <= self.position:
+            return
+        if self.position < end - self.buffer.capacity:
+            # Fell behind the ring (max_recording_s exceeded); skip ahead
+            self.position = end - self.buffer.capacity
+        self._write(self.buffer.get(self.position, end))
+        self.position = end
+
+    def finish(self, end=None):
+        """
+        Writes the remaining samples (up to absolute index end) and closes
+        the file. Returns the path, or None if nothing was recorded.
+        """
+        self._stop.set()
+        self._thread.join()
+        try:
+            self._drain(end)
+        finally:
+            self._file.close()
+        if self.position == 0:
+            self.discard()
+            return None
+        return self.path
+
+    def discard(self):
+        self._stop.set()
+        self._thread.join()
+        try:
+            self._file.close()
+        except Exception:
+            pass
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class AudioArchive:
+    """
+    Compact archive of raw recordings (16-bit WAV, or FLAC if soundfile is
+    installed) for audit and re-transcription. Files are named by time so
+    they sort chronologically; retention drops the oldest files beyond
+    'max_mb' in total or older than 'max_days'.
+    """
+
+    def __init__(self, directory, fmt="wav", max_mb=0, max_days=0):
+        self.directory = directory
+        self.fmt = fmt
+        self.max_mb = max_mb
+        self.max_days = max_days
+
+    def start(self, buffer, sample_rate):
+        os.makedirs(self.directory, exist_ok=True)
+        name = time.strftime("rec_%Y%m%d_%H%M%S_") + uuid.uuid4().hex[:6]
+        return ArchiveWriter(os.path.join(self.directory, name), buffer, sample_rate, self.fmt)
+
+    def files(self):
+        """
+        Archived files as (path, size, mtime), oldest first.
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(ARCHIVE_EXTENSIONS):
+                        stat = entry.stat()
+                        entries.append((entry.path, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        entries.sort(key=lambda e: e[2])
+        return entries
+
+    def enforce_retention(self, keep=None):
+        """
+        Deletes files past the age/size limits. keep is a path that must
+        survive (the recording that was just finished).
+        """
+        entries = self.files()
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, mtime in entries:
+            expired = self.max_days and now - mtime > self.max_days * 86400
+            over_size = self.max_mb and total > self.max_mb * 1024 * 1024
+            if not (expired or over_size) or path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError as e:
+                print(f"Archive: could not remove {path}: {e}")
+        if removed:
+            print(f"Archive: removed {removed} old recording(s)")
+        return removed
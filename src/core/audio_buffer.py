@@ -0,0 +1,86 @@
+import numpy as np
+
+class AudioBuffer:
+    """
+    Preallocated mono float32 capture buffer with ring semantics.
+
+    The whole capacity is reserved up front (np.empty only reserves address
+    space, pages are committed as they are written), so the audio callback
+    just copies each block into place without allocating. Once capacity is
+    exceeded the oldest audio is overwritten.
+
+    Sample indices used by get() are absolute: index 0 is the first sample
+    ever written, even if it has since been overwritten.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._data = np.empty(self.capacity, dtype=np.float32)
+        self._written = 0
+
+    def __len__(self):
+        return min(self._written, self.capacity)
+
+    @property
+    def total_written(self):
+        return self._written
+
+    @property
+    def dropped(self):
+        # Samples lost to ring wrap-around
+        return max(0, self._written - self.capacity)
+
+    def write(self, block):
+        """
+        Copies a 1-D block into the buffer. Called from the audio thread.
+        """
+        n = len(block)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest samples can be kept
+            self._written += n - self.capacity
+            block = block[n - self.capacity:]
+            n = self.capacity
+
+        pos = self._written % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = block[:first]
+        if first < n:
+            self._data[:n - first] = block[first:]
+
+        # Publish the new length only after the samples are in place
+        self._written += n
+
+    def copy_to(self, other, count=None):
+        """
+        Writes the newest count samples (default: all retained) into another
+        AudioBuffer, in at most two slices and without allocating. Safe to
+        call from the audio thread.
+        """
+        count = len(self) if count is None else min(count, len(self))
+        if count <= 0:
+            return
+        first = (self._written - count) % self.capacity
+        head = min(count, self.capacity - first)
+        other.write(self._data[first:first + head])
+        if head < count:
+            other.write(self._data[:count - head])
+
+    def get(self, start=0, end=None):
+        """
+        Returns samples [start:end) by absolute index. The result is a view
+        into the buffer unless the range crosses the ring boundary, in which
+        case the two parts are joined into a new array.
+        """
+        written = self._written
+        end = written if end is None else min(end, written)
+        start = max(start, written - self.capacity, 0)
+        if start >= end:
+            return self._data[:0]
+
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self._data[first:last]
+        return np.concatenate((self._data[first:], self._data[:last - self.capacity]))
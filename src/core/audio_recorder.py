@@ -1,74 +1,232 @@
-import sounddevice as sd
 import numpy as np
-import scipy.io.wavfile as wav
-import os
-import tempfile
-import uuid
+import threading
+from core.audio_buffer import AudioBuffer
+from core.audio_archive import AudioArchive
+from core.audio_source import SoundDeviceSource
 
 class AudioRecorder:
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, source=None):
         self.config = config_manager
+        # Microphone by default; tests inject a replay source (core.audio_source)
+        self.source = source or SoundDeviceSource()
         self.recording = False
-        self.audio_data = []
+        self.buffer = None
         self._stream = None
+        # Held while a stream opens or closes; core.devices re-initializes
+        # PortAudio under it, which must not overlap with an open stream
+        self.stream_lock = threading.Lock()
+        self._closing = False
+        # Called (on the PortAudio thread) when the stream stops by itself,
+        # e.g. because its device was unplugged
+        self.on_stream_lost = None
+        # Called once (on the PortAudio thread) when a recording reaches
+        # max_recording_s; capture then pauses until it is stopped. Streaming
+        # mode keeps capturing into the ring, the streaming transcriber has
+        # decoded the older audio by then.
+        self.on_buffer_full = None
+        self._wrap = False
+        self._full = False
+        
+        # Always-warm mode: the stream stays open between recordings and the
+        # callback keeps the last 'preroll_ms' of audio, which is prepended
+        # to the next recording so the first syllable isn't clipped.
+        self._warm = False
+        self._preroll = None
+        self._preroll_pending = False
+        self._restart_pending = False
+        
+        # Optional compact archive, encoded while recording (see core.audio_archive)
+        self.archive = None
+        self._archive_writer = None
+        self.last_audio_path = None
 
     def _callback(self, indata, frames, time, status):
+        # Runs on the PortAudio thread: copy into the preallocated buffers only
         if status:
             print(f"Error in audio stream: {status}")
         if self.recording:
-            self.audio_data.append(indata.copy())
+            if self._preroll_pending:
+                # First block of a recording on a warm stream
+                self._preroll.copy_to(self.buffer)
+                self._preroll_pending = False
+            if not self._wrap and len(self.buffer) + len(indata) > self.buffer.capacity:
+                if not self._full:
+                    self._full = True
+                    # Keep what fits rather than overwrite the start
+                    self.buffer.write(indata[:self.buffer.capacity - len(self.buffer), 0])
+                    if self.on_buffer_full:
+                        self.on_buffer_full()
+                return
+            self.buffer.write(indata[:, 0])
+        elif self._preroll is not None:
+            self._preroll.write(indata[:, 0])
 
-    def start_recording(self):
-        self.recording = True
-        self.audio_data = []
-        
+    def _finished_callback(self):
+        # Also runs when we stop the stream ourselves; only report a loss
+        if not self._closing and self.on_stream_lost:
+            self.on_stream_lost()
+
+    def stream_open(self):
+        return self._stream is not None
+
+    def sample_count(self):
+        return self.buffer.total_written if self.buffer else 0
+
+    def get_audio(self, start=0, end=None):
+        """
+        Returns samples [start:end) captured so far as a 1-D float32 array.
+        Safe to call from another thread while recording.
+        """
+        if not self.buffer:
+            return np.empty(0, dtype=np.float32)
+        return self.buffer.get(start, end)
+
+    def _open_stream(self):
         # Get settings from config
         device = self.config.get("input_device_id")
         sample_rate = self.config.get("sample_rate")
         
+        with self.stream_lock:
+            try:
+                self._stream = self.source.open(sample_rate, device, self._callback, self._finished_callback)
+                self._stream.start()
+                return True
+            except Exception as e:
+                print(f"Failed to start stream: {e}")
+                self._stream = None
+                # Fallback to default device if specific one failed
+                if device is not None:
+                    print("Retrying with default device...")
+                    try:
+                        self._stream = self.source.open(sample_rate, None, self._callback,
+                                                        self._finished_callback)
+                        self._stream.start()
+                        return True
+                    except Exception as ex:
+                         print(f"Fallback failed: {ex}")
+                         self._stream = None
+            return False
+
+    def _close_stream(self):
+        with self.stream_lock:
+            if self._stream:
+                self._closing = True
+                try:
+                    self._stream.stop()
+                    self._stream.close()
+                except Exception as e:
+                    # A stream whose device disappeared may fail to stop
+                    print(f"Error closing stream: {e}")
+                finally:
+                    self._stream = None
+                    self._closing = False
+
+    def open_warm_stream(self):
+        """
+        Opens the always-on input stream if 'keep_stream_open' is enabled.
+        """
+        if not self.config.get("keep_stream_open") or self._stream:
+            return
+        sample_rate = self.config.get("sample_rate")
+        self._preroll = AudioBuffer(self.config.get("preroll_ms") * sample_rate // 1000)
+        self._warm = self._open_stream()
+        if not self._warm:
+            self._preroll = None
+
+    def close(self):
+        self.recording = False
+        self._close_stream()
+        self._warm = False
+        self._preroll = None
+
+    def restart_stream(self):
+        """
+        Re-applies device/sample rate/warm-mode settings. Deferred until the
+        current recording stops.
+        """
+        if self.recording:
+            self._restart_pending = True
+            return
+        self._restart_pending = False
+        self.close()
+        self.open_warm_stream()
+
+    def _start_archive(self, sample_rate):
+        self.archive = AudioArchive(
+            self.config.get("audio_dir") or "recordings",
+            fmt=self.config.get("audio_format"),
+            max_mb=self.config.get("audio_retention_mb"),
+            max_days=self.config.get("audio_retention_days")
+        )
         try:
-            self._stream = sd.InputStream(
-                samplerate=sample_rate,
-                channels=1,
-                dtype='float32',
-                callback=self._callback,
-                device=device
-            )
-            self._stream.start()
+            self._archive_writer = self.archive.start(self.buffer, sample_rate)
         except Exception as e:
-            print(f"Failed to start stream: {e}")
-            self.recording = False
-            # Fallback to default device if specific one failed
-            if device is not None:
-                print("Retrying with default device...")
-                try:
-                    self._stream = sd.InputStream(
-                        samplerate=sample_rate,
-                        channels=1,
-                        dtype='float32',
-                        callback=self._callback
-                    )
-                    self._stream.start()
-                    self.recording = True
-                except Exception as ex:
-                     print(f"Fallback failed: {ex}")
-
-    def stop_recording(self):
+            print(f"Error starting audio archive: {e}")
+            self._archive_writer = None
+
+    def start_recording(self, trace=None):
+        # A fresh buffer per recording: the previous one may still be
+        # referenced by a transcription in progress.
+        sample_rate = self.config.get("sample_rate")
+        self.buffer = AudioBuffer(self.config.get("max_recording_s") * sample_rate)
+        self._wrap = bool(self.config.get("streaming_mode"))
+        self._full = False
+        
+        if self._warm and self._stream:
+            # Stream is already running: just switch the callback over
+            self._preroll_pending = True
+            self.recording = True
+        else:
+            self.recording = True
+            if not self._open_stream():
+                self.recording = False
+
+        # Only once capture runs, so a failed open leaves no writer or empty file;
+        # the writer starts from the buffer's first sample either way
+        if self.recording and self.config.get("save_audio_files"):
+            self._start_archive(sample_rate)
+
+        if trace:
+            trace.mark("stream_started")
+
+    def stop_recording(self, trace=None):
+        """
+        Stops the stream and returns the captured audio as a 1-D float32 view
+        of the capture buffer (no copy). The buffer is handed to the
+        transcriber directly. With 'save_audio_files' enabled the archived
+        file's path is left in last_audio_path.
+        """
         self.recording = False
-        if self._stream:
-            self._stream.stop()
-            self._stream.close()
-            self._stream = None
+        self._preroll_pending = False
+        if self._restart_pending:
+            # Settings changed mid-recording, possibly keep_stream_open itself
+            self.restart_stream()
+        elif not self._warm:
+            self._close_stream()
+        if trace:
+            trace.mark("stream_stopped")
         
-        if not self.audio_data:
+        writer, self._archive_writer = self._archive_writer, None
+        self.last_audio_path = None
+        if not self.buffer or len(self.buffer) == 0:
+            if writer:
+                writer.discard()
             return None
 
-        full_audio = np.concatenate(self.audio_data, axis=0)
-        
-        # Generate unique temp filename to avoid locks
-        unique_name = f"rec_{uuid.uuid4().hex[:8]}.wav"
-        temp_dir = tempfile.gettempdir()
-        output_path = os.path.join(temp_dir, unique_name)
-        
-        wav.write(output_path, self.config.get("sample_rate"), full_audio)
-        return output_path
\ No newline at end of file
+        if self.buffer.dropped:
+            seconds = self.buffer.dropped / self.config.get("sample_rate")
+            print(f"Recording exceeded max length, first {seconds:.1f}s dropped")
+
+        audio = self.buffer.get()
+
+        if writer:
+            # Most of the file was written while recording; only the tail is left
+            self.last_audio_path = writer.finish(self.buffer.total_written)
+            threading.Thread(
+                target=self.archive.enforce_retention,
+                kwargs={"keep": self.last_audio_path}, daemon=True
+            ).start()
+            if trace:
+                trace.mark("audio_saved")
+
+        return audio
@@ -0,0 +1,135 @@
+import threading
+import time
+import wave
+
+import numpy as np
+
+class SoundDeviceSource:
+    """
+    Live microphone capture through sounddevice/PortAudio (the default).
+
+    An audio source is anything with open(sample_rate, device, callback,
+    finished_callback=None) returning a stream with start()/stop()/close();
+    the stream calls callback(indata, frames, time, status) with float32
+    blocks of shape (frames, 1), like sd.InputStream, and
+    finished_callback() once it has stopped (also when it stops by itself,
+    e.g. because the device was unplugged).
+    """
+
+    def open(self, sample_rate, device, callback, finished_callback=None):
+        # Imported here so tests can run without PortAudio installed
+        import sounddevice as sd
+        return sd.InputStream(
+            samplerate=sample_rate,
+            channels=1,
+            dtype='float32',
+            callback=callback,
+            finished_callback=finished_callback,
+            device=device
+        )
+
+class ArraySource:
+    """
+    Replays a fixture buffer through the same callback contract as the
+    microphone, for headless load and soak tests.
+
+    speed is a multiple of real time (1.0 = live pace, 0 = as fast as
+    possible). After the end of the buffer playback loops, or continues
+    with silence if loop is False. The device argument is ignored, and a
+    replay never stops by itself, so finished_callback is not used.
+    """
+
+    def __init__(self, audio, sample_rate=16000, speed=1.0, blocksize=1024, loop=True):
+        self.audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        self.sample_rate = sample_rate
+        self.speed = speed
+        self.blocksize = blocksize
+        self.loop = loop
+
+    def samples_at(self, sample_rate):
+        if sample_rate == self.sample_rate or self.audio.size == 0:
+            return self.audio
+        # Linear interpolation is plenty for test fixtures
+        n = int(round(self.audio.size * sample_rate / self.sample_rate))
+        positions = np.arange(n) * (self.sample_rate / sample_rate)
+        return np.interp(positions, np.arange(self.audio.size), self.audio).astype(np.float32)
+
+    def open(self, sample_rate, device, callback, finished_callback=None):
+        return ReplayStream(self.samples_at(sample_rate), sample_rate, callback,
+                            self.speed, self.blocksize, self.loop)
+
+class FileSource(ArraySource):
+    """
+    ArraySource backed by a 16-bit PCM WAV file (mono or the first channel).
+    """
+
+    def __init__(self, path, speed=1.0, blocksize=1024, loop=True):
+        with wave.open(path, "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+            channels = f.getnchannels()
+            rate = f.getframerate()
+            data = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+        audio = data[::channels].astype(np.float32) / 32768.0
+        super().__init__(audio, rate, speed, blocksize, loop)
+
+class ReplayStream:
+    """
+    Stream returned by ArraySource.open(): a thread that delivers blocks on
+    a fixed schedule (no drift from sleep jitter).
+    """
+
+    def __init__(self, audio, sample_rate, callback, speed, blocksize, loop):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.callback = callback
+        self.speed = speed
+        self.blocksize = blocksize
+        self.loop = loop
+        self.position = 0
+        self._block = np.zeros((blocksize, 1), dtype=np.float32)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _fill(self):
+        block = self._block[:, 0]
+        filled = 0
+        while filled < self.blocksize:
+            if self.position >= self.audio.size:
+                if not self.loop or self.audio.size == 0:
+                    block[filled:] = 0.0
+                    break
+                self.position = 0
+            n = min(self.blocksize - filled, self.audio.size - self.position)
+            block[filled:filled + n] = self.audio[self.position:self.position + n]
+            filled += n
+            self.position += n
+
+    def _run(self):
+        period = self.blocksize / self.sample_rate / self.speed if self.speed > 0 else 0
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            self._fill()
+            self.callback(self._block, self.blocksize, None, None)
+            if period:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stop.wait(delay)
+            else:
+                # Let the consumer threads run
+                time.sleep(0)
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
@@ -0,0 +1,138 @@
+import numpy as np
+
+def frame_energy_db(audio, sample_rate, frame_ms=30):
+    """
+    Splits audio into fixed frames and returns (energy_db_per_frame, frame_len).
+    Trailing samples that do not fill a whole frame are ignored.
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(audio) // frame_len
+    if n_frames == 0:
+        return np.empty(0, dtype=np.float32), frame_len
+
+    frames = np.asarray(audio[:n_frames * frame_len], dtype=np.float32).reshape(n_frames, frame_len)
+    # Row-wise sum of squares without materializing frames**2
+    power = np.einsum('ij,ij->i', frames, frames) / frame_len
+    return 10.0 * np.log10(power + 1e-12), frame_len
+
+def silent_runs(silent):
+    """
+    Returns (starts, ends) frame indices of consecutive True runs in a bool array.
+    """
+    padded = np.concatenate(([False], silent, [False]))
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    return edges[0::2], edges[1::2]
+
+def find_pause(audio, sample_rate, threshold_db=-40, min_pause_ms=500, frame_ms=30):
+    """
+    Finds the last pause of at least min_pause_ms in audio.
+    Returns the sample index of the middle of that pause, or None.
+    """
+    energy, frame_len = frame_energy_db(audio, sample_rate, frame_ms)
+    if energy.size == 0:
+        return None
+
+    starts, ends = silent_runs(energy < threshold_db)
+    min_frames = max(1, int(min_pause_ms / frame_ms))
+    long_enough = np.flatnonzero((ends - starts) >= min_frames)
+    if long_enough.size == 0:
+        return None
+
+    last = long_enough[-1]
+    middle = (starts[last] + ends[last]) // 2
+    return int(middle * frame_len)
+
+def trim_silence(audio, sample_rate, threshold_db=-50, pad_ms=200,
+                 min_speech_ms=200, max_pause_ms=0, frame_ms=30):
+    """
+    Energy-based VAD gate applied before inference.
+
+    Trims leading/trailing dead air (keeping pad_ms around speech) and, if
+    max_pause_ms > 0, shortens internal pauses longer than that to
+    max_pause_ms. Returns (audio, stats); audio is empty when the clip has
+    less than min_speech_ms of frames above threshold_db. When only the
+    edges are trimmed, the result is a view of the input.
+    """
+    input_len = len(audio)
+    stats = {
+        "input_s": input_len / sample_rate,
+        "output_s": input_len / sample_rate,
+        "removed_s": 0.0,
+        "silent": False,
+    }
+
+    energy, frame_len = frame_energy_db(audio, sample_rate, frame_ms)
+    n_frames = energy.size
+    if n_frames == 0:
+        return audio, stats
+
+    voiced = energy >= threshold_db
+    if np.count_nonzero(voiced) * frame_ms < min_speech_ms:
+        stats.update(output_s=0.0, removed_s=stats["input_s"], silent=True)
+        return audio[:0], stats
+
+    pad = int(pad_ms / frame_ms)
+    voiced_idx = np.flatnonzero(voiced)
+    first = max(0, voiced_idx[0] - pad)
+    last = min(n_frames, voiced_idx[-1] + pad + 1)
+
+    # Samples past the last whole frame are kept only if speech runs to the end
+    end_sample = input_len if last == n_frames else last * frame_len
+
+    max_pause = int(max_pause_ms / frame_ms) if max_pause_ms else 0
+    cut_starts = cut_ends = None
+    if max_pause:
+        starts, ends = silent_runs(~voiced[first:last])
+        long_runs = (ends - starts) > max_pause
+        if np.any(long_runs):
+            # Keep max_pause/2 frames on each side of every long pause
+            half = max_pause // 2
+            cut_starts = first + starts[long_runs] + half
+            cut_ends = first + ends[long_runs] - (max_pause - half)
+
+    if cut_starts is None:
+        trimmed = audio[first * frame_len:end_sample]
+    else:
+        delta = np.zeros(n_frames + 1, dtype=np.int32)
+        np.add.at(delta, cut_starts, 1)
+        np.add.at(delta, cut_ends, -1)
+        keep = np.cumsum(delta[:-1]) == 0
+        keep[:first] = False
+        keep[last:] = False
+        mask = np.repeat(keep, frame_len)
+        trimmed = audio[:n_frames * frame_len][mask]
+        if end_sample > n_frames * frame_len:
+            trimmed = np.concatenate((trimmed, audio[n_frames * frame_len:]))
+
+    stats["output_s"] = len(trimmed) / sample_rate
+    stats["removed_s"] = stats["input_s"] - stats["output_s"]
+    return trimmed, stats
+
+def split_at_pauses(audio, sample_rate, target_s=30, min_s=None, frame_ms=30):
+    """
+    Splits audio into chunks of at most target_s seconds, cutting each one at
+    the quietest frame between min_s (default 2/3 of target) and target_s.
+    Returns a list of (start, end) sample indices covering the whole input.
+    """
+    total = len(audio)
+    max_len = int(target_s * sample_rate)
+    if total <= max_len:
+        return [(0, total)]
+
+    min_len = int((min_s if min_s is not None else target_s * 2 / 3) * sample_rate)
+    energy, frame_len = frame_energy_db(audio, sample_rate, frame_ms)
+
+    bounds = []
+    start = 0
+    while total - start > max_len:
+        lo = (start + min_len) // frame_len
+        hi = (start + max_len) // frame_len
+        window = energy[lo:hi]
+        if window.size:
+            cut = (lo + int(np.argmin(window))) * frame_len
+        else:
+            cut = start + max_len
+        bounds.append((start, cut))
+        start = cut
+    bounds.append((start, total))
+    return bounds
@@ -0,0 +1,166 @@
+import os
+import statistics
+import time
+
+from core.transcriber import Transcriber
+
+def word_error_rate(reference, hypothesis):
+    """
+    Word-level Levenshtein distance divided by the reference length.
+    """
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+def candidate_settings(device, cpu_count=None):
+    """
+    Returns (compute_types, thread_counts, beam_sizes) to try on this machine.
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    if device == "cuda":
+        compute_types = ["float16", "int8_float16", "int8"]
+        threads = [0]
+    else:
+        compute_types = ["int8", "int8_float32", "float32"]
+        threads = sorted({max(1, cpu_count // 4), max(1, cpu_count // 2), cpu_count})
+    beam_sizes = [1, 2, 5]
+    return compute_types, threads, beam_sizes
+
+class Autotuner:
+    """
+    Benchmarks a reference clip across compute_type, cpu_threads and
+    beam_size candidates and picks the fastest setting whose transcript
+    stays within a word-error-rate tolerance of the most accurate
+    configuration (float32/float16, beam 5).
+
+    Runs on the caller's thread and loads its own models, so the app's
+    current model keeps serving while it runs.
+    """
+
+    def __init__(self, config_manager, clip, sample_rate=None, progress=None, runs=2):
+        self.config = config_manager
+        self.clip = clip
+        self.sample_rate = sample_rate
+        self.progress = progress or (lambda message: print(message))
+        self.runs = runs
+        self.results = []
+        self.language = None # Pinned after the reference run when language is auto
+
+    def _transcriber(self, compute_type, cpu_threads):
+        # One replica and no long-form split: the calibration clip is a single
+        # short dictation, which decodes on one replica with cpu_threads
+        # either way. Extra replicas would only add load time and RAM per
+        # candidate, and thread counts are per decode in the app too.
+        config = self.config.snapshot()
+        config.set_many({
+            "compute_type": compute_type,
+            "cpu_threads": cpu_threads,
+            "num_workers": 1,
+            "long_form_enabled": False,
+            # The adaptive policy would override the beam being measured
+            "latency_target_ms": 0,
+            # Don't keep every candidate model resident
+            "model_cache_mb": 0,
+        })
+        if self.language:
+            # Same decode for every candidate: no detection pass, no sticky reuse
+            config.set("language", self.language)
+        transcriber = Transcriber(config)
+        if not transcriber.load_model():
+            return None
+        return transcriber
+
+    def _decode(self, transcriber):
+        # transcribe_iter() raises on failure; transcribe() would return an error string
+        return "".join(transcriber.transcribe_iter(self.clip, sample_rate=self.sample_rate)).strip()
+
+    def _measure(self, transcriber, beam_size):
+        transcriber.config.set("beam_size", beam_size)
+        times = []
+        text = ""
+        for _ in range(self.runs):
+            start = time.perf_counter()
+            text = self._decode(transcriber)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times), text
+
+    def run(self):
+        """
+        Returns the best settings as a dict of config keys, or None if the
+        reference transcript could not be produced.
+        """
+        device = self.config.get("device")
+        compute_types, threads, beam_sizes = candidate_settings(device)
+        tolerance = self.config.get("autotune_wer_tolerance")
+
+        # Reference: highest-precision compute type, widest beam, all cores
+        reference_type = "float16" if device == "cuda" else "float32"
+        self.progress(f"Calibrating: reference run ({reference_type}, beam 5)...")
+        transcriber = self._transcriber(reference_type, threads[-1])
+        if transcriber is None:
+            self.progress("Calibration aborted: the reference model failed to load.")
+            return None
+        try:
+            _, reference = self._measure(transcriber, 5)
+        except Exception as e:
+            self.progress(f"Calibration aborted: the reference run failed: {e}")
+            return None
+        if self.config.get("language") == "auto":
+            self.language = transcriber.languages.language
+        del transcriber
+        if not reference:
+            self.progress("Calibration aborted: the reference clip produced no text.")
+            return None
+
+        total = len(compute_types) * len(threads) * len(beam_sizes)
+        done = 0
+        for compute_type in compute_types:
+            for cpu_threads in threads:
+                transcriber = self._transcriber(compute_type, cpu_threads)
+                if transcriber is None:
+                    done += len(beam_sizes)
+                    continue # Compute type not supported on this hardware
+                try:
+                    # Warm-up so one-time init doesn't count against the first beam
+                    self._decode(transcriber)
+                    for beam_size in beam_sizes:
+                        done += 1
+                        self.progress(f"Calibrating {done}/{total}: {compute_type}, "
+                                      f"{cpu_threads or 'auto'} threads, beam {beam_size}")
+                        elapsed, text = self._measure(transcriber, beam_size)
+                        self.results.append({
+                            "compute_type": compute_type,
+                            "cpu_threads": cpu_threads,
+                            "beam_size": beam_size,
+                            "seconds": elapsed,
+                            "wer": word_error_rate(reference, text),
+                        })
+                except Exception as e:
+                    # A failing candidate is just not a candidate
+                    self.progress(f"Calibration: {compute_type}, {cpu_threads or 'auto'} threads failed: {e}")
+                del transcriber
+
+        accurate = [r for r in self.results if r["wer"] <= tolerance]
+        if not accurate:
+            return None
+        best = min(accurate, key=lambda r: r["seconds"])
+        self.progress(f"Best: {best['compute_type']}, {best['cpu_threads'] or 'auto'} threads, "
+                      f"beam {best['beam_size']} ({best['seconds']:.2f}s, WER {best['wer']:.1%})")
+        return {
+            "compute_type": best["compute_type"],
+            "cpu_threads": best["cpu_threads"],
+            "beam_size": best["beam_size"],
+        }
@@ -1,5 +1,8 @@
+import atexit
 import json
 import os
+import threading
+import time
 from PyQt6.QtCore import QObject, pyqtSignal
 
 class ConfigManager(QObject):
@@ -7,9 +10,25 @@ class ConfigManager(QObject):
     # Передает ключ и новое значение
     config_changed = pyqtSignal(str, object)
 
-    def __init__(self, config_file="config.json"):
+    def __init__(self, config_file="config.json", read_only=False, save_delay=0.5):
         super().__init__()
         self.config_file = config_file
+        # Headless tools (CLI, server) override settings in memory only
+        self.read_only = read_only
+        
+        # Write-behind: set() only marks the config dirty; one background
+        # writer thread coalesces bursts (slider drags, window moves) into
+        # one disk write once no change came in for save_delay.
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        # Serializes writers (writer thread, flush, explicit saves) on the shared temp file
+        self._write_lock = threading.Lock()
+        self._writer = None
+        self._wake = threading.Event()
+        self._save_due = 0.0
+        self._dirty = False
+        if not read_only:
+            atexit.register(self.flush)
         self.default_config = {
             # Window settings
             "window_x": 100,
@@ -22,20 +41,90 @@ class ConfigManager(QObject):
             "model_size": "base",  # tiny, base, small, medium, large
             "device": "auto",      # auto, cpu, cuda
             "language": "ru",      # ru, en, auto
+            "language_sticky_threshold": 0.8,  # auto: reuse a detection at least this confident
+            "language_recheck_every": 20,      # auto: re-detect after this many reused clips
+            "language_recheck_logprob": -1.5,  # auto: re-detect if the first segment scores below
+            "language_recheck_no_speech": 0.3, # ...and is speech (no_speech_prob below this)
+            "compute_type": "auto", # auto (int8 on CPU, float16 on CUDA), int8, float16, float32...
+            "cpu_threads": 0,      # Per replica; 0 = automatic (cores shared between replicas)
+            "num_workers": 1,      # Model replicas for parallel transcribe() calls
+            "beam_size": 5,
+            "model_cache_mb": 2048,         # RAM budget for keeping recently used models loaded
+            "model_idle_unload_min": 0,     # Free the model after this long unused; 0 = never
+            "latency_target_ms": 0,         # >0: pick model/beam per clip to meet this; 0 = off
+            "latency_fast_model": "tiny",   # Kept loaded as the fast path when a target is set
+            "latency_short_clip_s": 3,      # Shorter clips (commands) always take the fast path
+            "latency_long_rtf": 0.5,        # Longer clips may take this share of their duration
+            "autotune_on_first_run": True,  # Calibrate speed settings after the first dictation
+            "autotune_done": False,
+            "autotune_attempts": 0,         # Failed first-run calibrations so far
+            "autotune_max_attempts": 3,     # Give up on first-run calibration after this many
+            "autotune_wer_tolerance": 0.05, # Max word error rate vs. the most accurate setting
+            
+            # Silence trimming / VAD gate before inference
+            "vad_enabled": True,
+            "vad_threshold_db": -50,   # Frames quieter than this (dBFS) are silence
+            "vad_pad_ms": 200,         # Audio kept around speech when trimming
+            "vad_min_speech_ms": 200,  # Less speech than this = skip inference
+            "vad_max_pause_ms": 0,     # Shorten longer internal pauses to this; 0 = keep
+            
+            # Long recordings: split at pauses and decode chunk by chunk (or in parallel)
+            "long_form_enabled": True,
+            "long_form_threshold_s": 60, # Shorter recordings use a single pass
+            "long_form_chunk_s": 30,
+            "long_form_workers": 1,      # >1: chunks decode in parallel (more RAM, no cross-chunk prompt)
+            
+            # Streaming: decode chunks in the background while recording
+            "streaming_mode": False,
+            "stream_min_chunk_s": 5,      # Don't cut chunks shorter than this
+            "stream_max_chunk_s": 25,     # Force a cut if no pause was found
+            "stream_pause_ms": 500,       # Silence length that counts as a pause
+            "stream_silence_db": -40,     # Frames below this level are silence
+            "stream_poll_interval": 0.5,  # Seconds between background checks
             
             # Audio settings
             "input_device_id": None, # None = default system device
             "sample_rate": 16000,
+            "max_recording_s": 600,    # Recording stops at this length (streaming: keeps the newest audio)
+            "keep_stream_open": False, # Keep the mic stream running between recordings
+            "preroll_ms": 300,         # Audio kept from before the hotkey (keep_stream_open only)
+            "save_audio_files": False, # Archive each recording (encoded while recording)
+            "audio_dir": "",           # Empty = "recordings"
+            "audio_format": "wav",     # wav (16-bit PCM) or flac (needs soundfile)
+            "audio_retention_mb": 2048, # Oldest recordings are deleted beyond this; 0 = no limit
+            "audio_retention_days": 30, # 0 = keep forever
             
             # UX/Control settings
             "hotkey": "ctrl+shift+space",
             "use_sounds": True,
             "copy_to_clipboard": True,
             "type_text": True,
+            "progressive_output": False, # Paste each segment as soon as it is decoded
+            "paste_gap_ms": 50,          # Min gap between consecutive pastes
+            "dictionary_file": "",       # 'phrase => replacement' rules applied before output
+            "spoken_punctuation": False, # "запятая" -> "," etc.
+            
+            # Run the model in a supervised child process (ignored with server_url)
+            "inference_process": False,
+            
+            # Local inference server (src/server.py)
+            "server_url": "",        # e.g. http://127.0.0.1:8765; empty = in-process model
+            "server_port": 8765,
+            "server_max_batch": 4,   # Concurrent requests decoded together
+            "server_batch_window_ms": 20,
+            "server_max_queue": 16,  # Requests beyond this get HTTP 503
+            
+            # Diagnostics
+            "trace_enabled": True,   # Per-stage latency tracing
+            "trace_log": "logs/latency.jsonl",
+            "diagnostics_enabled": False,   # Sample RSS/threads/QObjects/allocations for leak hunting
+            "diagnostics_interval_s": 60,
+            "diagnostics_log": "logs/diagnostics.jsonl",
             
             # History
             "save_history": True,
-            "history_limit": 50
+            "history_limit": 50,
+            "history_file": "history.db"  # SQLite with full-text index
         }
         self.config = self.load_config()
 
@@ -55,18 +144,106 @@ class ConfigManager(QObject):
             return self.default_config.copy()
 
     def save_config(self):
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving config: {e}")
+        """
+        Writes the config atomically: a temp file in the same folder is
+        fully written and then swapped in, so a crash can't leave a
+        truncated config.json behind. Returns False if the write failed;
+        the config then stays dirty.
+        """
+        if self.read_only:
+            return True
+        # Snapshot inside the write lock too, so the last write is the newest data
+        with self._write_lock:
+            with self._lock:
+                self._dirty = False
+                data = json.dumps(self.config, indent=4, ensure_ascii=False)
+
+            tmp_file = self.config_file + ".tmp"
+            try:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+                return True
+            except Exception as e:
+                print(f"Error saving config: {e}")
+                with self._lock:
+                    self._dirty = True
+                return False
+
+    def _schedule_save(self):
+        if self.read_only:
+            return
+        with self._lock:
+            self._dirty = True
+            self._save_due = time.monotonic() + self.save_delay
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._writer_loop, name="config-writer", daemon=True)
+                self._writer.start()
+        self._wake.set()
+
+    def _writer_loop(self):
+        retry_s = 1.0
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # Debounce: wait until no set() came in for save_delay
+            while True:
+                with self._lock:
+                    delay = self._save_due - time.monotonic()
+                if delay <= 0:
+                    break
+                time.sleep(delay)
+            if self._save_if_dirty():
+                retry_s = 1.0
+            else:
+                # Disk full, file locked...: try again later rather than lose the change
+                with self._lock:
+                    self._save_due = time.monotonic() + retry_s
+                retry_s = min(retry_s * 2, 60.0)
+                self._wake.set()
+
+    def _save_if_dirty(self):
+        if self._dirty:
+            return self.save_config()
+        return True
+
+    def flush(self):
+        """
+        Writes pending changes immediately. Called on quit.
+        """
+        self._save_if_dirty()
+
+    def snapshot(self):
+        """
+        Read-only copy of the current settings, for background tools that
+        tweak values (e.g. calibration) without touching the app's config.
+        """
+        copy = ConfigManager(self.config_file, read_only=True)
+        with self._lock:
+            copy.config = dict(self.config)
+        return copy
 
     def get(self, key):
         return self.config.get(key, self.default_config.get(key))
 
     def set(self, key, value):
-        # Only save and signal if value actually changed
-        if self.config.get(key) != value:
-            self.config[key] = value
-            self.save_config()
-            self.config_changed.emit(key, value)
\ No newline at end of file
+        self.set_many({key: value})
+
+    def set_many(self, values):
+        """
+        Updates several keys with a single (deferred) save. The signal is
+        emitted for every key whose value actually changed.
+        """
+        changed = []
+        with self._lock:
+            for key, value in values.items():
+                if self.config.get(key) != value:
+                    self.config[key] = value
+                    changed.append((key, value))
+        
+        if changed:
+            self._schedule_save()
+            for key, value in changed:
+                self.config_changed.emit(key, value)
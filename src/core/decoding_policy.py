@@ -0,0 +1,160 @@
+import threading
+
+# Ordered fastest -> most accurate
+MODEL_TIERS = ["tiny", "base", "small", "medium", "large"]
+
+# Relative decode cost per model size and beam size. Only used until real
+# measurements exist for a combination; one measurement of any combination
+# scales all the priors to this machine.
+PRIOR_MODEL_COST = {"tiny": 1.0, "base": 1.8, "small": 4.5, "medium": 11.0, "large": 22.0}
+PRIOR_BEAM_COST = {1: 1.0, 2: 1.25, 5: 1.7}
+
+# Default faster-whisper temperature fallback; the fast path decodes once
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Whisper pads every clip to a 30 s window, so part of the decode time
+# (mostly the encoder) does not shrink with the clip. Until clips of
+# different lengths have been measured, that fixed part is assumed to cost
+# as much as decoding this many seconds of audio.
+PRIOR_FIXED_EQUIV_S = 10.0
+
+# Spread of measured clip durations (variance, s^2) needed to fit the
+# fixed and per-second costs separately
+MIN_DURATION_VARIANCE = 4.0
+
+def model_tier(model_size):
+    base = model_size.split(".")[0].split("-")[0]
+    return MODEL_TIERS.index(base) if base in MODEL_TIERS else len(MODEL_TIERS)
+
+class AdaptivePolicy:
+    """
+    Picks decoding settings per clip from the user's latency target
+    ('latency_target_ms') and the clip's duration.
+
+    Decode time is modelled per (model_size, beam_size) as a fixed cost plus
+    a cost per audio second, fitted from exponentially weighted
+    measurements (priors fill in combinations not measured yet).
+
+    Clips shorter than 'latency_short_clip_s' (commands) take the fast
+    path: 'latency_fast_model' (or the fastest loaded model), beam 2 at
+    most and no temperature fallback. Longer dictation may take up to
+    'latency_long_rtf' of its own duration when that exceeds the target, and
+    gets the most accurate loaded model and beam whose estimate fits that
+    budget, with temperature fallback when there is twice the time needed.
+    """
+
+    BEAM_SIZES = (5, 2, 1)
+    FAST_BEAM = 2
+
+    def __init__(self, config_manager, alpha=0.3):
+        self.config = config_manager
+        self.alpha = alpha
+        # (model_size, beam_size) -> exponentially weighted means of
+        # [audio_s, elapsed_s, audio_s^2, audio_s * elapsed_s]
+        self.moments = {}
+        self._lock = threading.Lock()
+
+    def enabled(self):
+        return bool(self.config.get("latency_target_ms"))
+
+    def record(self, model_size, beam_size, audio_s, elapsed_s):
+        if audio_s <= 0:
+            return
+        sample = [audio_s, elapsed_s, audio_s * audio_s, audio_s * elapsed_s]
+        key = (model_size, beam_size)
+        with self._lock:
+            previous = self.moments.get(key)
+            self.moments[key] = sample if previous is None else [
+                self.alpha * new + (1 - self.alpha) * old for new, old in zip(sample, previous)
+            ]
+
+    @staticmethod
+    def _fit(moments):
+        """
+        (fixed_s, per_audio_s) from the weighted means of one combination.
+        """
+        mean_x, mean_y, mean_xx, mean_xy = moments
+        variance = mean_xx - mean_x * mean_x
+        if variance >= MIN_DURATION_VARIANCE:
+            per_s = max(0.0, (mean_xy - mean_x * mean_y) / variance)
+            return max(0.0, mean_y - per_s * mean_x), per_s
+        # One clip length seen so far: split the time with the prior
+        per_s = mean_y / (mean_x + PRIOR_FIXED_EQUIV_S)
+        return per_s * PRIOR_FIXED_EQUIV_S, per_s
+
+    def _prior(self, model_size, beam_size):
+        base = model_size.split(".")[0].split("-")[0]
+        return PRIOR_MODEL_COST.get(base, 11.0) * PRIOR_BEAM_COST.get(beam_size, 1.7)
+
+    def estimate_cost(self, model_size, beam_size):
+        """
+        (fixed_s, per_audio_s) for a combination, or None before any
+        measurement.
+        """
+        with self._lock:
+            moments = self.moments.get((model_size, beam_size))
+            if moments is not None:
+                return self._fit(moments)
+            if not self.moments:
+                return None
+            fits = [(self._fit(v), self._prior(m, b)) for (m, b), v in self.moments.items()]
+        # Scale the prior by how this machine compares on measured combos
+        prior = self._prior(model_size, beam_size)
+        fixed_scale = sum(fixed / p for (fixed, _), p in fits) / len(fits)
+        per_scale = sum(per_s / p for (_, per_s), p in fits) / len(fits)
+        return prior * fixed_scale, prior * per_scale
+
+    def estimate_seconds(self, model_size, beam_size, audio_s):
+        cost = self.estimate_cost(model_size, beam_size)
+        if cost is None:
+            return None
+        fixed_s, per_s = cost
+        return fixed_s + per_s * audio_s
+
+    def choose(self, audio_s, available_models):
+        """
+        Returns {"model_size", "beam_size", "temperature"} for a clip of
+        audio_s seconds, using only models in available_models.
+        """
+        models = sorted(set(available_models), key=model_tier, reverse=True)
+        default_beam = self.config.get("beam_size")
+
+        if audio_s < self.config.get("latency_short_clip_s"):
+            fast_model = self.config.get("latency_fast_model")
+            return {
+                "model_size": fast_model if fast_model in models else models[-1],
+                "beam_size": min(self.FAST_BEAM, default_beam),
+                "temperature": 0.0,
+            }
+
+        budget_s = max(self.config.get("latency_target_ms") / 1000.0,
+                       audio_s * self.config.get("latency_long_rtf"))
+        for model_size in models:
+            for beam_size in self.BEAM_SIZES:
+                if beam_size > default_beam:
+                    continue
+                estimate = self.estimate_seconds(model_size, beam_size, audio_s)
+                if estimate is None:
+                    # Nothing measured yet: start from the configured setting
+                    return {"model_size": models[0], "beam_size": default_beam,
+                            "temperature": FALLBACK_TEMPERATURES}
+                if estimate <= budget_s:
+                    # Temperature fallback re-decodes; only allow it with headroom
+                    headroom = estimate * 2 <= budget_s
+                    return {
+                        "model_size": model_size,
+                        "beam_size": beam_size,
+                        "temperature": FALLBACK_TEMPERATURES if headroom else 0.0,
+                    }
+
+        # Nothing fits: fastest available path
+        return {"model_size": models[-1], "beam_size": 1, "temperature": 0.0}
+
+    def stats(self):
+        with self._lock:
+            keys = list(self.moments)
+        stats = {}
+        for model_size, beam_size in keys:
+            fixed_s, per_s = self.estimate_cost(model_size, beam_size)
+            stats[f"{model_size}/beam{beam_size}"] = {"fixed_s": round(fixed_s, 3), "per_audio_s": round(per_s, 3)}
+        return stats
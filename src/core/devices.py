@@ -0,0 +1,84 @@
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class DeviceMonitor(QObject):
+    """
+    Cached list of audio input devices.
+
+    sd.query_devices() can take hundreds of milliseconds on some host APIs,
+    so it runs on a background thread and the Settings dialog reads the
+    cached result. devices_changed is emitted after each refresh.
+
+    PortAudio only enumerates devices when it is initialized, so a refresh
+    re-initializes it to see microphones plugged in or removed since. That
+    is only possible with no stream open: an idle stream of the recorder
+    (keep_stream_open) is closed for the rescan and reopened afterwards;
+    during a recording the cached list is reported instead.
+
+    stream_lost is emitted when the recorder's stream stops by itself
+    (its device disappeared).
+    """
+    devices_changed = pyqtSignal(list)
+    stream_lost = pyqtSignal()
+
+    def __init__(self, recorder=None):
+        super().__init__()
+        self.devices = []
+        self.recorder = recorder
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._reopen = False
+        if recorder is not None:
+            recorder.on_stream_lost = self.stream_lost.emit
+        # Emitted from the refresh thread, delivered in the GUI thread
+        self.devices_changed.connect(self._on_refreshed)
+
+    def refresh(self, rescan=True):
+        """
+        Call from the GUI thread (it may close the recorder's idle stream).
+        rescan=False lists what PortAudio already knows, e.g. at startup.
+        """
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        rescan = rescan and self.recorder is not None
+        if rescan and not self.recorder.recording and self.recorder.stream_open():
+            self.recorder.close()
+            self._reopen = True
+        threading.Thread(target=self._run, args=(rescan,), daemon=True).start()
+
+    def _rescan(self, sd):
+        with self.recorder.stream_lock:
+            if self.recorder.stream_open():
+                return False # Recording started meanwhile
+            # Private in sounddevice, but the only way to make PortAudio
+            # enumerate devices again
+            sd._terminate()
+            sd._initialize()
+            return True
+
+    def _run(self, rescan):
+        devices = []
+        try:
+            import sounddevice as sd
+            if rescan and not self._rescan(sd):
+                print("Audio stream open; showing the cached device list.")
+            for i, dev in enumerate(sd.query_devices()):
+                if dev['max_input_channels'] > 0:
+                    devices.append((i, f"{dev['name']} ({dev['hostapi']})"))
+        except Exception as e:
+            print(f"Device enumeration failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+        self.devices = devices
+        self.devices_changed.emit(devices)
+
+    def _on_refreshed(self, devices):
+        if self._reopen:
+            self._reopen = False
+            # Deferred to the end of a recording that started meanwhile;
+            # falls back to the default device if the configured one is gone
+            self.recorder.restart_stream()
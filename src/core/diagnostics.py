@@ -0,0 +1,208 @@
+import gc
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter, deque
+
+from PyQt6.QtCore import QObject
+
+from core.sysinfo import get_rss_mb
+
+# Growth over the window that counts as a leak suspect, per metric
+GROWTH_THRESHOLDS = {
+    "rss_mb": 20.0,
+    "child_rss_mb": 20.0,
+    "threads": 2,
+    "qobjects": 20,
+    "python_objects": 20000,
+    "traced_mb": 10.0,
+}
+
+# tracemalloc is process-wide: started for the first Diagnostics that needs
+# it (unless something else already runs it) and stopped after the last one
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+def _acquire_tracing():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0:
+            _tracing_owned = not tracemalloc.is_tracing()
+            if _tracing_owned:
+                tracemalloc.start()
+        _tracing_users += 1
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def is_growing(values, threshold, min_samples=6):
+    """
+    True if values rise across the window: almost every step is
+    non-decreasing, and the total rise is above threshold.
+    """
+    if len(values) < min_samples:
+        return False
+    steps = [b - a for a, b in zip(values, values[1:])]
+    rising = sum(1 for s in steps if s >= 0)
+    return rising >= 0.9 * len(steps) and values[-1] - values[0] >= threshold
+
+class Diagnostics:
+    """
+    Long-session resource telemetry ('diagnostics_enabled').
+
+    Every 'interval_s' a background thread samples RSS, thread count, live
+    QObject wrappers (by class), the Python object count and, through
+    tracemalloc, the source lines whose allocations grew most since the
+    first sample. Samples go to a rotating JSONL log. Metrics that rise
+    steadily across the last 'window' samples are flagged as suspects in
+    the log and in summary().
+
+    tracemalloc slows allocation noticeably, which is why this is opt-in.
+
+    child_pid is an optional callable returning the pid of a process whose
+    RSS is sampled too ('child_rss_mb'), e.g. the inference process, which
+    rss_mb doesn't include.
+    """
+
+    def __init__(self, log_path, interval_s=60, window=30, top_n=10, max_bytes=2_000_000,
+                 backup_count=3, child_pid=None):
+        self.interval_s = interval_s
+        self.child_pid = child_pid
+        self.top_n = top_n
+        self.samples = deque(maxlen=window)
+        self.suspects = []
+        self._baseline = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._handler = None
+
+        try:
+            log_dir = os.path.dirname(log_path)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            self._handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+        except Exception as e:
+            print(f"Failed to open diagnostics log: {e}")
+
+    def start(self):
+        if self._thread:
+            return
+        _acquire_tracing()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="diagnostics", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=0.5):
+        """
+        Called on the GUI thread, so it waits at most timeout: a sample on
+        a large heap can take seconds. A sampler still busy stops after its
+        current phase and cleans up by itself.
+        """
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is None:
+            self._close_log()
+            return
+        thread.join(timeout)
+
+    def _close_log(self):
+        if self._handler:
+            self._handler.close()
+            self._handler = None
+
+    def _run(self):
+        try:
+            while True:
+                try:
+                    self.sample()
+                except Exception as e:
+                    print(f"Diagnostics sample failed: {e}")
+                if self._stop.wait(self.interval_s):
+                    break
+        finally:
+            self._baseline = None
+            _release_tracing()
+            self._close_log()
+
+    def sample(self):
+        """
+        Takes one sample. Returns None if stop() was called in between.
+        """
+        objects = gc.get_objects()
+        qobjects = Counter(type(o).__name__ for o in objects if isinstance(o, QObject))
+        python_objects = len(objects)
+        del objects
+        if self._stop.is_set():
+            return None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+        if self._baseline is None:
+            self._baseline = snapshot
+        top = [
+            {
+                "where": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "growth_kb": round(stat.size_diff / 1024, 1),
+            }
+            for stat in snapshot.compare_to(self._baseline, "lineno")[:self.top_n]
+        ]
+        traced, _ = tracemalloc.get_traced_memory()
+        if self._stop.is_set():
+            return None
+        pid = self.child_pid() if self.child_pid else None
+
+        sample = {
+            "time": time.time(),
+            "rss_mb": round(get_rss_mb() or 0, 1),
+            "child_rss_mb": round(get_rss_mb(pid) or 0, 1) if pid else 0,
+            "threads": threading.active_count(),
+            "qobjects": sum(qobjects.values()),
+            "python_objects": python_objects,
+            "traced_mb": round(traced / (1024 * 1024), 2),
+            "qobject_types": dict(qobjects.most_common(10)),
+            "top_allocations": top,
+        }
+        self.samples.append(sample)
+
+        self.suspects = [
+            metric for metric, threshold in GROWTH_THRESHOLDS.items()
+            if is_growing([s[metric] for s in self.samples], threshold)
+        ]
+        sample["growing"] = self.suspects
+        if self.suspects:
+            print(f"Diagnostics: steady growth in {', '.join(self.suspects)}")
+
+        if self._handler:
+            record = logging.makeLogRecord({"msg": json.dumps(sample, ensure_ascii=False)})
+            self._handler.handle(record)
+        return sample
+
+    def summary(self):
+        if not self.samples:
+            return "No diagnostics samples yet."
+        first, last = self.samples[0], self.samples[-1]
+        minutes = (last["time"] - first["time"]) / 60
+        lines = [f"Last {len(self.samples)} samples ({minutes:.0f} min):"]
+        for metric in GROWTH_THRESHOLDS:
+            flag = "  <- growing" if metric in self.suspects else ""
+            lines.append(f"{metric:<16}{first[metric]:>10} -> {last[metric]:<10}{flag}")
+        if last["top_allocations"]:
+            top = last["top_allocations"][0]
+            lines.append(f"Top growth: {top['where']} (+{top['growth_kb']} KB)")
+        return "\n".join(lines)
@@ -0,0 +1,174 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    text TEXT NOT NULL,
+    duration_s REAL,
+    model TEXT,
+    latency_s REAL,
+    audio_path TEXT
+);
+"""
+
+# External-content FTS5 index kept in sync by triggers
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    text, content='history', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts(history_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+COLUMN_NAMES = ("id", "created_at", "text", "duration_s", "model", "latency_s", "audio_path")
+COLUMNS = ", ".join(COLUMN_NAMES)
+
+def _row_to_dict(row):
+    return dict(zip(COLUMN_NAMES, row))
+
+def fts_query(text):
+    """
+    Turns free user input into a safe FTS5 query: every word must match,
+    the last one as a prefix (search-as-you-type).
+    """
+    words = [w.replace('"', '""') for w in text.split()]
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+class HistoryStore:
+    """
+    Append-only transcription history in SQLite with a full-text index.
+
+    add() never blocks: entries are written by a background thread, which
+    also evicts the oldest rows beyond 'limit' (a primary-key range delete).
+    Reads use their own connection; WAL mode lets them run while the writer
+    is busy. Falls back to LIKE search if SQLite was built without FTS5.
+    """
+
+    def __init__(self, db_path, limit=50):
+        self.db_path = db_path
+        self.limit = limit
+        self.fts_enabled = False
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._queue = queue.Queue()
+        self._reader = self._connect()
+        self._init_schema(self._reader)
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_schema(self, conn):
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"History: full-text search unavailable ({e}), using LIKE")
+        conn.commit()
+
+    def add(self, text, duration_s=None, model=None, latency_s=None, audio_path=None, created_at=None):
+        if not text:
+            return
+        self._queue.put((
+            created_at if created_at is not None else time.time(),
+            text, duration_s, model, latency_s, audio_path
+        ))
+
+    def set_limit(self, limit):
+        self.limit = limit
+        self._queue.put("evict")
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            try:
+                # Batch everything that piled up into one transaction
+                items = [item]
+                while True:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in items
+                entries = [i for i in items if isinstance(i, tuple)]
+                if entries:
+                    conn.executemany(
+                        "INSERT INTO history (created_at, text, duration_s, model, latency_s, audio_path) "
+                        "VALUES (?, ?, ?, ?, ?, ?)", entries
+                    )
+                self._evict(conn)
+                conn.commit()
+                if stop:
+                    break
+            except Exception as e:
+                print(f"History write failed: {e}")
+        conn.close()
+
+    def _evict(self, conn):
+        if not self.limit or self.limit <= 0:
+            return
+        conn.execute(
+            "DELETE FROM history WHERE id <= (SELECT MAX(id) FROM history) - ?", (self.limit,)
+        )
+
+    def recent(self, limit=50):
+        rows = self._reader.execute(
+            f"SELECT {COLUMNS} FROM history ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [_row_to_dict(r) for r in rows]
+
+    def search(self, text, limit=50):
+        query = fts_query(text)
+        if not query:
+            return self.recent(limit)
+
+        if self.fts_enabled:
+            rows = self._reader.execute(
+                f"SELECT {', '.join('h.' + c for c in COLUMN_NAMES)} "
+                "FROM history_fts JOIN history h ON h.id = history_fts.rowid "
+                "WHERE history_fts MATCH ? ORDER BY h.id DESC LIMIT ?",
+                (query, limit)
+            ).fetchall()
+        else:
+            pattern = "%" + text.replace("%", "").replace("_", "") + "%"
+            rows = self._reader.execute(
+                f"SELECT {COLUMNS} FROM history WHERE text LIKE ? ORDER BY id DESC LIMIT ?",
+                (pattern, limit)
+            ).fetchall()
+        return [_row_to_dict(r) for r in rows]
+
+    def count(self):
+        return self._reader.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def close(self, timeout=5):
+        """
+        Flushes pending writes and closes the database.
+        """
+        self._queue.put(None)
+        self._writer.join(timeout)
+        self._reader.close()
@@ -0,0 +1,371 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from core.transcriber import model_key_for
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+def _worker_main(conn, config_file, values):
+    """
+    Entry point of the inference process. Serves requests from the pipe;
+    'config' updates are applied in order, everything else runs on its own
+    thread so a model hot-swap doesn't hold up decoding.
+    """
+    # Imported here: the parent only needs the proxy
+    from core.config_manager import ConfigManager
+    from core.tracing import Trace
+    from core.transcriber import Transcriber
+
+    config = ConfigManager(config_file, read_only=True)
+    config.config = dict(values)
+    transcriber = Transcriber(config)
+    send_lock = threading.Lock()
+    # Segments are reused by the parent, so attach to each one only once
+    segments = {}
+
+    def reply(req_id, ok, result):
+        with send_lock:
+            conn.send((req_id, ok, result))
+
+    def handle(req_id, method, payload):
+        try:
+            if method == "load":
+                ok = transcriber.load_model()
+                result = {"loaded": ok, "key": transcriber.current_key}
+            else:
+                if "path" in payload:
+                    audio = payload["path"]
+                else:
+                    name = payload["shm"]
+                    if name not in segments:
+                        segments[name] = shared_memory.SharedMemory(name=name)
+                    # Zero-copy view; the parent keeps the segment until we reply
+                    audio = np.ndarray((payload["samples"],), dtype=np.float32,
+                                       buffer=segments[name].buf)
+                trace = Trace(None, "worker")
+                # transcribe_iter() raises, so failures reach the parent as errors
+                text = "".join(transcriber.transcribe_iter(
+                    audio, initial_prompt=payload.get("prompt"), trace=trace,
+                    sample_rate=payload.get("sample_rate")
+                )).strip()
+                del audio
+                result = {
+                    "text": text,
+                    "model_size": transcriber.last_model_size,
+                    "stages_ms": {k: round(v * 1000, 3) for k, v in trace.stage_durations().items()},
+                    "vad": transcriber.last_vad_stats,
+                }
+            reply(req_id, True, result)
+        except Exception as e:
+            reply(req_id, False, str(e))
+
+    while True:
+        try:
+            req_id, method, payload = conn.recv()
+        except (EOFError, OSError):
+            break # Parent went away
+        if method == "stop":
+            break
+        if method == "config":
+            config.config.update(payload)
+            continue
+        if method == "detach":
+            segment = segments.pop(payload, None)
+            if segment is not None:
+                try:
+                    segment.close()
+                except BufferError:
+                    pass
+            continue
+        threading.Thread(target=handle, args=(req_id, method, payload), daemon=True).start()
+
+    for segment in segments.values():
+        try:
+            segment.close()
+        except BufferError:
+            pass # A decode still holds a view; the OS cleans up on exit
+
+class ProcessTranscriber:
+    """
+    Drop-in replacement for Transcriber that runs the model in a supervised
+    child process (used when 'inference_process' is set in config), so
+    decoding doesn't compete with the overlay for the GIL and a crash in
+    CTranslate2 or a bad model load can't take the app down.
+
+    Audio is passed through shared memory segments that are reused between
+    calls; only a small request header goes through the pipe. If the child
+    dies, in-flight calls are retried once on a fresh process and the model
+    is reloaded in the background.
+    """
+
+    # Give up on automatic restarts after this many crashes in a minute
+    MAX_RESTARTS = 3
+    RESTART_WINDOW_S = 60
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.current_key = None
+        self.last_vad_stats = None
+        self.last_model_size = None # Model that decoded the last clip
+        self._loaded = False
+        self._want_loaded = False
+
+        self._process = None
+        self._conn = None
+        self._generation = 0
+        self._closing = False
+        self._crashes = []
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._free_segments = []
+        self._segments_lock = threading.Lock()
+
+        # Keep the child's settings in step with the app's
+        self.config.config_changed.connect(self._on_config_changed)
+
+    def is_loaded(self):
+        return self._loaded
+
+    @property
+    def pid(self):
+        process = self._process
+        return process.pid if process is not None else None
+
+    def needs_reload(self):
+        return not self._loaded or self.current_key != model_key_for(self.config)
+
+    def load_model(self):
+        self._want_loaded = True
+        try:
+            result = self._call("load", {})
+        except Exception as e:
+            print(f"Inference worker failed to load the model: {e}")
+            self._loaded = False
+            return False
+        self._loaded = result["loaded"]
+        if result["key"] is not None:
+            self.current_key = tuple(result["key"])
+        return self._loaded
+
+    def transcribe(self, audio, initial_prompt=None, trace=None, sample_rate=None):
+        """
+        Like Transcriber.transcribe(): failures come back as an error string.
+        """
+        try:
+            return "".join(self.transcribe_iter(audio, initial_prompt, trace, sample_rate))
+        except Exception as e:
+            print(f"Error during transcription: {e}")
+            return f"[Error: {e}]"
+
+    def transcribe_iter(self, audio, initial_prompt=None, trace=None, sample_rate=None):
+        """
+        The child returns the whole text, so it is yielded as one segment.
+        Raises on failure.
+        """
+        if audio is None:
+            return
+
+        segment = None
+        if isinstance(audio, str):
+            payload = {"path": audio}
+        else:
+            samples = np.asarray(audio, dtype=np.float32).reshape(-1)
+            if samples.size == 0:
+                return
+            segment = self._take_segment(samples.nbytes)
+            np.ndarray(samples.shape, dtype=np.float32, buffer=segment.buf)[:] = samples
+            payload = {
+                "shm": segment.name,
+                "samples": samples.size,
+                "sample_rate": sample_rate or self.config.get("sample_rate"),
+            }
+        if initial_prompt:
+            payload["prompt"] = initial_prompt
+
+        if trace:
+            trace.mark("request_sent")
+        try:
+            result = self._call("transcribe", payload)
+        finally:
+            if segment is not None:
+                self._release_segment(segment)
+
+        self.last_vad_stats = result["vad"]
+        self.last_model_size = result["model_size"]
+        if trace:
+            trace.annotate(worker_stages_ms=result["stages_ms"])
+            trace.mark("decode_done")
+        yield result["text"]
+
+    def unload(self):
+        """
+        Stops the child process, which frees the model together with
+        everything else it allocated (including the CUDA context). The next
+        load_model() or transcribe() starts a new one.
+        """
+        self._want_loaded = False
+        self._loaded = False
+        self.current_key = None
+        self._stop_process()
+
+    def close(self, timeout=3):
+        self._closing = True
+        self._stop_process(timeout)
+        with self._segments_lock:
+            for segment in self._free_segments:
+                segment.close()
+                segment.unlink()
+            self._free_segments = []
+
+    # --- Process supervision ---
+
+    def _stop_process(self, timeout=3):
+        with self._lock:
+            process, conn = self._process, self._conn
+            self._process = None
+            # The reader thread's exit is expected, not a crash
+            self._generation += 1
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError("inference worker stopped"))
+        if process is not None:
+            try:
+                with self._send_lock:
+                    conn.send((0, "stop", None))
+            except OSError:
+                pass
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+    def _ensure_process(self):
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("Inference worker is shut down")
+            if self._process is not None and self._process.is_alive():
+                return self._generation
+            context = multiprocessing.get_context("spawn")
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_worker_main,
+                args=(child_conn, self.config.config_file, self.config.snapshot().config),
+                name="inference-worker",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._generation += 1
+            self._process, self._conn = process, parent_conn
+            threading.Thread(
+                target=self._read_loop, args=(parent_conn, self._generation), daemon=True
+            ).start()
+            print(f"Inference worker started (pid {process.pid})")
+            return self._generation
+
+    def _read_loop(self, conn, generation):
+        while True:
+            try:
+                req_id, ok, result = conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(req_id, None)
+            if future is None:
+                continue
+            if ok:
+                future.set_result(result)
+            else:
+                future.set_exception(RuntimeError(result))
+        self._on_worker_exit(generation)
+
+    def _on_worker_exit(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._process = None
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(WorkerCrashed("inference worker exited"))
+        if self._closing:
+            return
+
+        self._loaded = False
+        now = time.monotonic()
+        self._crashes = [t for t in self._crashes if now - t < self.RESTART_WINDOW_S] + [now]
+        if len(self._crashes) > self.MAX_RESTARTS:
+            print("Inference worker keeps crashing; it will be restarted on the next request.")
+        elif self._want_loaded:
+            print("Inference worker exited unexpectedly; restarting...")
+            threading.Thread(target=self.load_model, daemon=True).start()
+
+    def _call(self, method, payload):
+        for attempt in range(2):
+            generation = self._ensure_process()
+            future = Future()
+            req_id = next(self._ids)
+            with self._lock:
+                if self._process is None or generation != self._generation:
+                    # Exited right after the liveness check
+                    if attempt:
+                        raise WorkerCrashed("inference worker exited")
+                    continue
+                self._pending[req_id] = future
+                conn = self._conn
+            try:
+                with self._send_lock:
+                    conn.send((req_id, method, payload))
+            except OSError:
+                # Died between the liveness check and the send; the reader
+                # thread fails the future
+                pass
+            try:
+                return future.result()
+            except WorkerCrashed:
+                if attempt:
+                    raise
+
+    def _notify(self, method, payload):
+        # Fire-and-forget message; a new process starts from a clean state
+        with self._lock:
+            conn = self._conn if self._process is not None else None
+        if conn is None:
+            return
+        try:
+            with self._send_lock:
+                conn.send((0, method, payload))
+        except OSError:
+            pass
+
+    def _on_config_changed(self, key, value):
+        self._notify("config", {key: value})
+
+    # --- Shared memory ---
+
+    def _take_segment(self, nbytes):
+        with self._segments_lock:
+            for i, segment in enumerate(self._free_segments):
+                if segment.size >= nbytes:
+                    return self._free_segments.pop(i)
+        # Round up to whole MiB so slightly longer clips reuse the segment
+        size = max(1, -(-nbytes // (1 << 20))) << 20
+        return shared_memory.SharedMemory(create=True, size=size)
+
+    def _release_segment(self, segment):
+        with self._segments_lock:
+            self._free_segments.append(segment)
+            self._free_segments.sort(key=lambda s: s.size)
+            # Keep a couple around (streaming chunks overlap with the final job)
+            extras = self._free_segments[:-2]
+            del self._free_segments[:-2]
+        for extra in extras:
+            self._notify("detach", extra.name)
+            extra.close()
+            extra.unlink()
@@ -1,21 +1,49 @@
 import keyboard
+import math
 import pyperclip
 import time
+from collections import deque
+from PyQt6.QtCore import QTimer
 
 class InputHandler:
     def __init__(self, config_manager=None):
         self.config = config_manager
         self.current_hotkey = None
         self.callback = None
+        self._last_paste = 0.0
+        # Pastes waiting for paste_gap_ms to pass; sent by a timer
+        self._pending = deque()
+        self._scheduled = False
 
-    def type_text(self, text):
+    def type_text(self, text, trace=None):
         """
         Copies text to clipboard and simulates Ctrl+V to paste it.
         This is more reliable than typing character by character for Cyrillic.
+
+        Back-to-back pastes (progressive output) are spaced paste_gap_ms
+        apart so the target app reads the clipboard before it is
+        overwritten; a timer sends the next one instead of the GUI thread
+        sleeping. A single paste goes out immediately. Call from the GUI thread.
         """
         if not text:
             return
+        self._pending.append((text, trace))
+        if not self._scheduled:
+            self._paste_next()
+
+    def _paste_next(self):
+        self._scheduled = False
+        while self._pending:
+            gap = self.config.get("paste_gap_ms") / 1000.0 if self.config else 0.05
+            wait = self._last_paste + gap - time.perf_counter()
+            if wait > 0:
+                self._scheduled = True
+                QTimer.singleShot(math.ceil(wait * 1000), self._paste_next)
+                return
+            text, trace = self._pending.popleft()
+            self._paste(text, trace)
 
+    def _paste(self, text, trace):
         # 1. Put new text into clipboard
         # Note: We rely on user config preference for 'copy_to_clipboard' if we were strict,
         # but for pasting we MUST use clipboard as the transport mechanism.
@@ -23,10 +51,13 @@ class InputHandler:
             pyperclip.copy(text)
             
             # 2. Simulate Ctrl+V
-            time.sleep(0.1) # Small delay to ensure focus
             keyboard.press_and_release('ctrl+v')
+            if trace:
+                trace.mark("paste_sent")
         except Exception as e:
             print(f"Error typing text: {e}")
+        finally:
+            self._last_paste = time.perf_counter()
 
     def register_hotkey(self, hotkey_str, callback):
         """
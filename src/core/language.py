@@ -0,0 +1,86 @@
+import threading
+from collections import deque
+
+class LanguageCache:
+    """
+    Session-level language memory for language="auto".
+
+    Detection costs a pass of the encoder over the first 30 s on every
+    clip, although a user almost always keeps speaking the same language.
+    Once a language was detected with probability >= 'language_sticky_threshold'
+    it is passed to the decoder directly for the next clips. It is
+    re-detected after 'language_recheck_every' clips, or immediately when
+    the first decoded segment looks wrong for the forced language: average
+    log-probability below 'language_recheck_logprob' while the segment is
+    likely speech (no_speech_prob below 'language_recheck_no_speech'), so
+    noisy or mumbled short commands don't trigger a second decode.
+    """
+
+    def __init__(self, config_manager, window=50):
+        self.config = config_manager
+        self.language = None
+        self.probability = 0.0
+        self.clips_since_check = 0
+        self.detections = 0
+        self.reuses = 0
+        self.rechecks = 0
+        self.switches = 0
+        self.detect_times = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def sticky(self):
+        """
+        The language to force for the next clip, or None to detect.
+        """
+        with self._lock:
+            if (self.language
+                    and self.probability >= self.config.get("language_sticky_threshold")
+                    and self.clips_since_check < self.config.get("language_recheck_every")):
+                self.clips_since_check += 1
+                self.reuses += 1
+                return self.language
+        return None
+
+    def detected(self, language, probability, elapsed_s=None):
+        with self._lock:
+            if self.language and language != self.language:
+                self.switches += 1
+            self.language = language
+            self.probability = probability or 0.0
+            self.clips_since_check = 0
+            self.detections += 1
+            if elapsed_s is not None:
+                self.detect_times.append(elapsed_s)
+
+    def is_suspect(self, segment):
+        # Decoding speech in the wrong language gives very unlikely tokens;
+        # over noise or silence the tokens are unlikely in any language
+        return (segment.avg_logprob < self.config.get("language_recheck_logprob")
+                and segment.no_speech_prob < self.config.get("language_recheck_no_speech"))
+
+    def invalidate(self):
+        with self._lock:
+            self.language = None
+            self.rechecks += 1
+
+    def stats(self):
+        with self._lock:
+            times = sorted(self.detect_times)
+            return {
+                "language": self.language,
+                "probability": round(self.probability, 3),
+                "detections": self.detections,
+                "reuses": self.reuses,
+                "rechecks": self.rechecks,
+                "switches": self.switches,
+                "detect_ms_p50": round(times[len(times) // 2] * 1000, 1) if times else None,
+            }
+
+    def format_stats(self):
+        stats = self.stats()
+        if not stats["detections"]:
+            return "Language detection: not used yet."
+        detect = f", detection p50 {stats['detect_ms_p50']} ms" if stats["detect_ms_p50"] is not None else ""
+        return (f"Language: {stats['language']} (p={stats['probability']}), "
+                f"detected {stats['detections']}x, reused {stats['reuses']}x, "
+                f"re-checked {stats['rechecks']}x{detect}")
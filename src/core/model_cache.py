@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+
+# Rough resident size of each Whisper model in MB at int8. Used only to keep
+# the cache under its memory budget, so estimates are good enough.
+MODEL_MEMORY_MB = {
+    "tiny": 100,
+    "base": 200,
+    "small": 550,
+    "medium": 1500,
+    "large": 3000,
+}
+
+# Relative size of other compute types compared to int8
+COMPUTE_TYPE_FACTOR = {
+    "int8": 1.0,
+    "int8_float16": 1.2,
+    "int8_float32": 1.2,
+    "float16": 2.0,
+    "float32": 4.0,
+}
+
+def estimate_model_mb(key):
+    model_size, _device, compute_type = key[:3]
+    base = MODEL_MEMORY_MB.get(model_size.split(".")[0].split("-")[0], 1500)
+    return base * COMPUTE_TYPE_FACTOR.get(compute_type, 2.0)
+
+class ModelCache:
+    """
+    LRU cache of loaded WhisperModel instances keyed by Transcriber.model_key()
+    (model_size, device, compute_type, cpu_threads, num_workers). When the
+    estimated total exceeds the memory budget, least recently used models are
+    evicted; the model that was just requested is always kept, even if it
+    alone exceeds the budget.
+    """
+
+    def __init__(self, budget_mb):
+        self.budget_mb = budget_mb
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def keys(self):
+        with self._lock:
+            return list(self._models.keys())
+
+    def get(self, key):
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+            return model
+
+    def put(self, key, model):
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            self._evict(keep=key)
+
+    def remove(self, key):
+        with self._lock:
+            return self._models.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+    def total_mb(self):
+        with self._lock:
+            return sum(estimate_model_mb(k) for k in self._models)
+
+    def set_budget(self, budget_mb):
+        with self._lock:
+            self.budget_mb = budget_mb
+            if self._models:
+                self._evict(keep=next(reversed(self._models)))
+
+    def _evict(self, keep):
+        # Caller holds the lock. Dropping our reference is enough: a model
+        # still decoding elsewhere stays alive until that call returns.
+        total = sum(estimate_model_mb(k) for k in self._models)
+        for key in list(self._models.keys()):
+            if total <= self.budget_mb:
+                break
+            if key == keep:
+                continue
+            del self._models[key]
+            total -= estimate_model_mb(key)
+            print(f"Model cache: evicted {key} (budget {self.budget_mb} MB)")
@@ -0,0 +1,291 @@
+import os
+import threading
+from collections import deque
+
+# Built-in spoken punctuation ('spoken_punctuation'); the dictionary file
+# can add more or override these. Common nouns ("period", "colon") are left
+# out: they occur in ordinary speech far more often than as commands.
+SPOKEN_PUNCTUATION = {
+    "запятая": ",",
+    "точка": ".",
+    "точка с запятой": ";",
+    "двоеточие": ":",
+    "вопросительный знак": "?",
+    "восклицательный знак": "!",
+    "многоточие": "...",
+    "новая строка": "\n",
+    "comma": ",",
+    "full stop": ".",
+    "semicolon": ";",
+    "question mark": "?",
+    "exclamation mark": "!",
+    "ellipsis": "...",
+    "new line": "\n",
+}
+
+# A punctuation command is only taken as one at a boundary (see PostProcessor);
+# with one of these words in front it applies anywhere: "знак точка", "insert comma"
+COMMAND_PREFIXES = ("знак", "insert")
+
+PUNCTUATION = set(",.;:?!…")
+
+def is_punctuation(replacement):
+    stripped = replacement.strip(" ")
+    return bool(stripped) and (set(stripped) <= PUNCTUATION or stripped == "\n")
+
+def _lower_same_length(text):
+    # str.lower() can change the length ('İ' -> 'i̇'), which would shift
+    # match positions; such characters are left as they are
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+def parse_dictionary(lines):
+    """
+    Parses 'phrase => replacement' lines (a tab works as the separator
+    too). Blank lines and lines starting with # are ignored. Returns
+    {phrase: replacement}.
+    """
+    rules = {}
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if "=>" in line:
+            source, _, target = line.partition("=>")
+        elif "\t" in line:
+            source, _, target = line.partition("\t")
+        else:
+            continue
+        source = " ".join(source.split())
+        target = target.strip().replace("\\n", "\n")
+        if source:
+            rules[source] = target
+    return rules
+
+class Automaton:
+    """
+    Aho-Corasick automaton over lower-cased phrases. find() scans the text
+    once, whatever the number of phrases, and returns non-overlapping
+    whole-word matches, preferring the leftmost and then the longest.
+    """
+
+    def __init__(self, phrases):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]] # Pattern ids ending at each node (via output links)
+        self.lengths = []
+        for phrase in phrases:
+            self._add(_lower_same_length(phrase))
+        self._link()
+
+    def _add(self, phrase):
+        node = 0
+        for char in phrase:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(len(self.lengths))
+        self.lengths.append(len(phrase))
+
+    def _link(self):
+        # Breadth-first: a node's failure link is set before its children's
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text):
+        """
+        Returns [(start, end, pattern_id)] sorted by start.
+        """
+        lowered = _lower_same_length(text)
+        n = len(text)
+        goto, fail, out, lengths = self.goto, self.fail, self.out, self.lengths
+        candidates = []
+        node = 0
+        for i, char in enumerate(lowered):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            for pattern_id in out[node]:
+                start = end - lengths[pattern_id]
+                # Whole words only: no letter/digit directly outside a word edge
+                if start > 0 and lowered[start].isalnum() and lowered[start - 1].isalnum():
+                    continue
+                if end < n and lowered[end - 1].isalnum() and lowered[end].isalnum():
+                    continue
+                candidates.append((start, -lengths[pattern_id], pattern_id))
+
+        candidates.sort()
+        matches = []
+        position = 0
+        for start, negative_length, pattern_id in candidates:
+            if start >= position:
+                matches.append((start, start - negative_length, pattern_id))
+                position = start - negative_length
+        return matches
+
+class PostProcessor:
+    """
+    Text normalization between the transcriber and the output: applies the
+    user dictionary ('dictionary_file', thousands of 'phrase => replacement'
+    rules for jargon and names) and optionally spoken punctuation, through
+    one compiled Aho-Corasick automaton instead of a str.replace loop.
+
+    Matching is case-insensitive and on whole words; a replacement keeps a
+    capital first letter of the original. Punctuation replacements attach
+    to the preceding word (and absorb punctuation Whisper already put
+    there), so "привет запятая, как дела" becomes "привет, как дела".
+
+    Punctuation words are also ordinary words ("ключевая точка проекта"),
+    so a punctuation rule only fires at a boundary: at the end of the text
+    (segment), before punctuation Whisper wrote for the pause, or before
+    another punctuation command. Prefixed with a COMMAND_PREFIXES word it
+    fires anywhere.
+
+    The dictionary file is reloaded (in the background) when its mtime changes.
+    """
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self._lock = threading.Lock() # Serializes rebuilds
+        self._source = None # (path, mtime, spoken_punctuation) the automaton was built from
+        # (automaton, replacements, at_boundary), swapped as a whole so
+        # process() never sees a half-built set; at_boundary marks patterns
+        # that only apply at a boundary
+        self._compiled = (None, [], [])
+        self._rebuilding = False
+
+    def _current_source(self):
+        path = self.config.get("dictionary_file")
+        try:
+            mtime = os.path.getmtime(path) if path else None
+        except OSError:
+            mtime = None
+        return (path, mtime, bool(self.config.get("spoken_punctuation")))
+
+    def _build(self, source):
+        path, mtime, spoken = source
+        rules = dict(SPOKEN_PUNCTUATION) if spoken else {}
+        if mtime is not None:
+            try:
+                with open(path, "r", encoding="utf-8-sig") as f:
+                    rules.update(parse_dictionary(f))
+                print(f"Dictionary: {len(rules)} rules loaded from {path}")
+            except Exception as e:
+                print(f"Error loading dictionary {path}: {e}")
+
+        phrases = list(rules)
+        replacements = [rules[p] for p in phrases]
+        at_boundary = [is_punctuation(r) for r in replacements]
+        for phrase, replacement, command in list(zip(phrases, replacements, at_boundary)):
+            if command:
+                for prefix in COMMAND_PREFIXES:
+                    if f"{prefix} {phrase}" not in rules:
+                        phrases.append(f"{prefix} {phrase}")
+                        replacements.append(replacement)
+                        at_boundary.append(False)
+
+        return (Automaton(phrases) if phrases else None, replacements, at_boundary)
+
+    def refresh(self):
+        """
+        Rebuilds the automaton if the dictionary or settings changed, on
+        the calling thread. Returns (automaton, replacements, at_boundary).
+        """
+        with self._lock:
+            source = self._current_source()
+            if source != self._source:
+                self._compiled = self._build(source)
+                self._source = source
+            self._rebuilding = False
+            return self._compiled
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self.refresh, daemon=True).start()
+
+    def process(self, text):
+        """
+        Called on the GUI thread: a changed dictionary is compiled in the
+        background while the previous automaton keeps serving. Only the
+        very first build (normally done at startup) is waited for.
+        """
+        if not text:
+            return text
+        if self._source is None:
+            automaton, replacements, at_boundary = self.refresh()
+        else:
+            if self._current_source() != self._source:
+                self._refresh_in_background()
+            automaton, replacements, at_boundary = self._compiled
+        if automaton is None:
+            return text
+        matches = self._at_boundaries(text, automaton.find(text), replacements, at_boundary)
+        return self._apply(text, matches, replacements)
+
+    @staticmethod
+    def _at_boundaries(text, matches, replacements, at_boundary):
+        """
+        Drops punctuation matches that are not at a boundary. Walks from the
+        end, so in a chain of commands ("точка новая строка") each one sees
+        whether the next was kept.
+        """
+        kept = []
+        next_command = None # Start of the next kept punctuation match
+        for start, end, pattern_id in reversed(matches):
+            if at_boundary[pattern_id]:
+                rest = text[end:].lstrip(" ")
+                if rest and rest[0] not in PUNCTUATION and rest[0] != "\n" \
+                        and next_command != len(text) - len(rest):
+                    continue
+            if is_punctuation(replacements[pattern_id]):
+                next_command = start
+            kept.append((start, end, pattern_id))
+        kept.reverse()
+        return kept
+
+    @staticmethod
+    def _apply(text, matches, replacements):
+        parts = []
+        position = 0
+        for start, end, pattern_id in matches:
+            if start < position:
+                continue # Inside punctuation absorbed by the previous match
+            replacement = replacements[pattern_id]
+            parts.append(text[position:start])
+            if is_punctuation(replacement):
+                # Attach to the previous word and drop Whisper's own punctuation
+                if parts:
+                    parts[-1] = parts[-1].rstrip(" ").rstrip("".join(PUNCTUATION))
+                while end < len(text) and text[end] in PUNCTUATION:
+                    end += 1
+                if replacement.strip(" ") == "\n":
+                    while end < len(text) and text[end] == " ":
+                        end += 1
+            elif replacement and text[start].isupper() and replacement[0].islower():
+                replacement = replacement[0].upper() + replacement[1:]
+            parts.append(replacement)
+            position = end
+        parts.append(text[position:])
+        return "".join(parts)
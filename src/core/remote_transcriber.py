@@ -0,0 +1,108 @@
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+class RemoteTranscriber:
+    """
+    Drop-in replacement for Transcriber that sends audio to a local
+    inference server (src/server.py) instead of loading a model in this
+    process. Used when 'server_url' is set in config.
+    """
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.current_key = None
+        self.last_vad_stats = None
+        self.last_model_size = None # Model that decoded the last clip
+        self._healthy = False
+
+    @property
+    def base_url(self):
+        return self.config.get("server_url").rstrip("/")
+
+    def is_loaded(self):
+        return self._healthy
+
+    def needs_reload(self):
+        # Model choice belongs to the server
+        return False
+
+    def unload(self):
+        # The server owns the model and its lifetime
+        pass
+
+    def load_model(self):
+        """
+        Checks that the server is up and has its model loaded.
+        """
+        try:
+            with urllib.request.urlopen(self.base_url + "/health", timeout=5) as response:
+                health = json.loads(response.read().decode("utf-8"))
+            self._healthy = health.get("status") == "ok"
+            self.current_key = (health.get("model"), health.get("device"))
+            print(f"Inference server at {self.base_url}: {health}")
+        except Exception as e:
+            print(f"Inference server not reachable at {self.base_url}: {e}")
+            self._healthy = False
+        return self._healthy
+
+    def transcribe(self, audio, initial_prompt=None, trace=None, sample_rate=None):
+        """
+        Like Transcriber.transcribe(): failures come back as an error string.
+        """
+        try:
+            return "".join(self.transcribe_iter(audio, initial_prompt, trace, sample_rate))
+        except Exception as e:
+            print(f"Error during transcription: {e}")
+            return f"[Error: {e}]"
+
+    def transcribe_iter(self, audio, initial_prompt=None, trace=None, sample_rate=None):
+        """
+        The server answers with the whole text, so it is yielded as one
+        segment. Raises on failure.
+        """
+        if audio is None:
+            return
+
+        if isinstance(audio, str):
+            with open(audio, "rb") as f:
+                body = f.read()
+            params = {}
+        else:
+            samples = np.ascontiguousarray(audio, dtype="<f4").reshape(-1)
+            if samples.size == 0:
+                return
+            body = samples.tobytes()
+            params = {
+                "sample_rate": sample_rate or self.config.get("sample_rate"),
+                "format": "f32",
+            }
+        if initial_prompt:
+            params["prompt"] = initial_prompt
+
+        url = self.base_url + "/transcribe"
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        request = urllib.request.Request(
+            url, data=body, headers={"Content-Type": "application/octet-stream"}
+        )
+
+        if trace:
+            trace.mark("request_sent")
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                result = json.loads(response.read().decode("utf-8"))
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+            except Exception:
+                message = str(e)
+            raise RuntimeError(f"Inference server error: {message}") from None
+        if trace:
+            trace.mark("decode_done")
+        # The server's loaded model, as reported by /health
+        self.last_model_size = self.current_key[0] if self.current_key else None
+        yield result.get("text", "")
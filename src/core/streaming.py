@@ -0,0 +1,101 @@
+import threading
+
+from core.audio_utils import find_pause
+
+class StreamingTranscriber:
+    """
+    Decodes a recording in the background while it is still being captured.
+    Audio is cut into chunks at pauses; each committed chunk is transcribed
+    once and its text kept, so stopping only needs the last partial chunk.
+    """
+
+    def __init__(self, transcriber, recorder, config_manager):
+        self.transcriber = transcriber
+        self.recorder = recorder
+        self.config = config_manager
+
+        self.sample_rate = self.config.get("sample_rate")
+        # Keep our own reference: the recorder swaps buffers on the next start
+        self.buffer = recorder.buffer
+        self.committed = 0 # Samples already decoded (absolute buffer index)
+        self.texts = []
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        poll_interval = self.config.get("stream_poll_interval")
+        while not self._stop_event.wait(poll_interval):
+            try:
+                self._process_pending()
+            except Exception as e:
+                print(f"Streaming decode error: {e}")
+
+    def _process_pending(self):
+        min_chunk = int(self.config.get("stream_min_chunk_s") * self.sample_rate)
+        max_chunk = int(self.config.get("stream_max_chunk_s") * self.sample_rate)
+
+        total = self.buffer.total_written
+        # Skip anything the ring buffer has already overwritten
+        if self.buffer.dropped > self.committed:
+            seconds = (self.buffer.dropped - self.committed) / self.sample_rate
+            print(f"Streaming fell behind max_recording_s, {seconds:.1f}s of audio dropped")
+            self.committed = self.buffer.dropped
+        if total - self.committed < min_chunk:
+            return
+
+        pending = self.buffer.get(self.committed, total)
+
+        # Only look for a pause after the minimum chunk length
+        cut = find_pause(
+            pending[min_chunk:],
+            self.sample_rate,
+            threshold_db=self.config.get("stream_silence_db"),
+            min_pause_ms=self.config.get("stream_pause_ms")
+        )
+        if cut is not None:
+            cut += min_chunk
+        elif len(pending) >= max_chunk:
+            # No pause found in time, force a cut to keep the tail short
+            cut = max_chunk
+        else:
+            return
+
+        if self._stop_event.is_set():
+            return # finish() will decode everything that is left
+        self._commit(pending[:cut])
+        self.committed += cut
+
+    def _commit(self, chunk, trace=None):
+        prompt = " ".join(self.texts) or None
+        # Raises on failure: an error must not become text or the next prompt.
+        # The chunk stays uncommitted, so it is retried (or fails finish()).
+        text = "".join(self.transcriber.transcribe_iter(chunk, initial_prompt=prompt, trace=trace)).strip()
+        if text:
+            self.texts.append(text)
+
+    def cancel(self):
+        self._stop_event.set()
+
+    def finish(self, audio=None, trace=None):
+        """
+        Stops background decoding, transcribes the remaining tail of the
+        recording and returns the full text. Blocks until done.
+        """
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if trace:
+            trace.mark("stream_joined")
+
+        total = self.buffer.total_written
+        if total > self.committed:
+            self._commit(self.buffer.get(self.committed, total), trace=trace)
+            self.committed = total
+
+        return " ".join(self.texts).strip()
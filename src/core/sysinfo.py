@@ -0,0 +1,79 @@
+import os
+import sys
+
+def _windows_memory_counters(pid=None):
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.windll.kernel32
+    if pid is None:
+        process = kernel32.GetCurrentProcess()
+    else:
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        process = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not process:
+            return None
+    ok = ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb)
+    if pid is not None:
+        kernel32.CloseHandle(process)
+    return counters if ok else None
+
+def _proc_status_kb(field, pid=None):
+    try:
+        with open(f"/proc/{pid or 'self'}/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def get_rss_mb(pid=None):
+    """
+    Current resident set size (working set on Windows) in MB of this
+    process, or of another process by pid. None if unavailable.
+    """
+    if sys.platform == "win32":
+        counters = _windows_memory_counters(pid)
+        return counters.WorkingSetSize / (1024 * 1024) if counters else None
+
+    kb = _proc_status_kb("VmRSS", pid)
+    return kb / 1024 if kb is not None else None
+
+def get_peak_rss_mb():
+    """
+    Peak resident set size of this process in MB, or None.
+    """
+    if sys.platform == "win32":
+        counters = _windows_memory_counters()
+        return counters.PeakWorkingSetSize / (1024 * 1024) if counters else None
+
+    kb = _proc_status_kb("VmHWM")
+    if kb is not None:
+        return kb / 1024
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KB elsewhere
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        return None
+
+def get_cpu_count():
+    return os.cpu_count() or 1
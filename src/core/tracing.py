@@ -0,0 +1,176 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of an unsorted list (pct in 0..100).
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+class Trace:
+    """
+    Monotonic timestamps for the stages of one utterance. mark() may be
+    called from any thread; the duration of a stage is the time since the
+    previous mark.
+    """
+
+    def __init__(self, tracer, name, start_time=None):
+        self.tracer = tracer
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.wall_time = time.time()
+        self.marks = [("start", start_time if start_time is not None else time.perf_counter())]
+        self.attrs = {}
+        self.finished = False
+
+    def mark(self, stage, at=None):
+        self.marks.append((stage, at if at is not None else time.perf_counter()))
+
+    def annotate(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if not self.finished:
+            self.finished = True
+            self.tracer.record(self)
+
+    def stage_durations(self):
+        durations = {}
+        for (_, previous), (stage, current) in zip(self.marks, self.marks[1:]):
+            # A stage that happens more than once (e.g. streaming chunks) accumulates
+            durations[stage] = durations.get(stage, 0.0) + (current - previous)
+        return durations
+
+    def to_dict(self):
+        start = self.marks[0][1]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "wall_time": self.wall_time,
+            "marks": [[stage, round((t - start) * 1000, 3)] for stage, t in self.marks],
+            "stages_ms": {k: round(v * 1000, 3) for k, v in self.stage_durations().items()},
+            "attrs": self.attrs,
+        }
+
+class _NullTrace:
+    """
+    Stand-in used when tracing is disabled, so callers never check for None.
+    """
+    trace_id = None
+
+    def mark(self, stage, at=None):
+        pass
+
+    def annotate(self, **attrs):
+        pass
+
+    def finish(self):
+        pass
+
+NULL_TRACE = _NullTrace()
+
+class LatencyTracer:
+    """
+    Collects per-stage latency traces. Finished traces are appended as JSON
+    lines to a rotating log (written on a background thread) and kept in a
+    rolling window for p50/p95 summaries.
+
+    'latency' is the user-visible wait: from the stop press (the
+    'stop_pressed' mark) to the last mark of the trace.
+    """
+
+    def __init__(self, log_path=None, max_bytes=1_000_000, backup_count=3, window=200, enabled=True):
+        self.enabled = enabled
+        self._history = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._listener = None
+        self._logger = None
+
+        if enabled and log_path:
+            try:
+                log_dir = os.path.dirname(log_path)
+                if log_dir:
+                    os.makedirs(log_dir, exist_ok=True)
+                handler = logging.handlers.RotatingFileHandler(
+                    log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+                )
+                handler.setFormatter(logging.Formatter("%(message)s"))
+
+                # File IO happens on the listener thread, never on the caller's
+                log_queue = queue.Queue()
+                self._listener = logging.handlers.QueueListener(log_queue, handler)
+                self._listener.start()
+
+                self._logger = logging.getLogger(f"freetranscriber.trace.{id(self)}")
+                self._logger.setLevel(logging.INFO)
+                self._logger.propagate = False
+                self._logger.addHandler(logging.handlers.QueueHandler(log_queue))
+            except Exception as e:
+                print(f"Failed to open latency log: {e}")
+
+    def start(self, name="utterance", start_time=None):
+        if not self.enabled:
+            return NULL_TRACE
+        return Trace(self, name, start_time)
+
+    def record(self, trace):
+        stages = trace.stage_durations()
+        marks = dict(trace.marks)
+        if "stop_pressed" in marks:
+            stages["latency"] = trace.marks[-1][1] - marks["stop_pressed"]
+
+        with self._lock:
+            self._history.append(stages)
+
+        if self._logger:
+            data = trace.to_dict()
+            if "latency" in stages:
+                data["latency_ms"] = round(stages["latency"] * 1000, 3)
+            self._logger.info(json.dumps(data, ensure_ascii=False))
+
+    def summary(self):
+        """
+        Returns {stage: {"count", "p50_ms", "p95_ms"}} over the rolling window.
+        """
+        with self._lock:
+            history = list(self._history)
+
+        samples = {}
+        for stages in history:
+            for stage, value in stages.items():
+                samples.setdefault(stage, []).append(value)
+
+        return {
+            stage: {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+            }
+            for stage, values in samples.items()
+        }
+
+    def format_summary(self):
+        summary = self.summary()
+        if not summary:
+            return "No transcriptions recorded yet."
+
+        lines = [f"{'Stage':<18}{'p50 ms':>10}{'p95 ms':>10}{'n':>6}"]
+        for stage, stats in summary.items():
+            lines.append(f"{stage:<18}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['count']:>6}")
+        return "\n".join(lines)
+
+    def close(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
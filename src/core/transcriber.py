@@ -1,78 +1,446 @@
+import gc
 import os
-from faster_whisper import WhisperModel
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import time
+from core.model_cache import ModelCache
+from core.audio_utils import trim_silence, split_at_pauses
+from core.decoding_policy import AdaptivePolicy, model_tier
+from core.language import LanguageCache
+
+# faster-whisper expects in-memory audio as 16 kHz mono float32
+MODEL_SAMPLE_RATE = 16000
+
+def model_key_for(config, model_size=None):
+    """
+    Model identity implied by the settings in config (see Transcriber.model_key).
+    """
+    device = config.get("device")
+    compute_type = config.get("compute_type")
+    if compute_type == "auto":
+        compute_type = "float16" if device == "cuda" else "int8"
+    num_workers = config.get("num_workers")
+    if config.get("long_form_enabled"):
+        # Long-form chunks decode in parallel only with enough replicas
+        num_workers = max(num_workers, config.get("long_form_workers"))
+    cpu_threads = config.get("cpu_threads")
+    if not cpu_threads and num_workers > 1 and device != "cuda":
+        # Automatic threads are per replica; share the cores between replicas
+        # that decode at the same time instead of oversubscribing them
+        cpu_threads = max(1, (os.cpu_count() or 1) // num_workers)
+    return (
+        model_size or config.get("model_size"), device, compute_type,
+        cpu_threads, num_workers
+    )
 
 class Transcriber:
     def __init__(self, config_manager):
         self.config = config_manager
         self.model = None
         self.current_model_size = None
+        self.current_key = None
+        
+        # Recently used models stay resident (within the RAM budget) so that
+        # switching back and forth between sizes doesn't reload from disk.
+        self.cache = ModelCache(self.config.get("model_cache_mb"))
+        
+        # Stats of the last VAD pass (see apply_vad)
+        self.last_vad_stats = None
+        # Model that decoded the last clip (the latency policy may pick another)
+        self.last_model_size = None
         
-        # Load initial model
-        self.load_model()
+        # Per-clip model/beam choice for the latency target (see decoding_policy)
+        self.policy = AdaptivePolicy(self.config)
+        
+        # Remembered language for language="auto" (see core.language)
+        self.languages = LanguageCache(self.config)
+        
+        # The model is loaded lazily (see load_model), usually from a
+        # background thread at startup. Callers that need it block on this lock
+        # until the load in progress completes.
+        self._load_lock = threading.Lock()
+
+    def is_loaded(self):
+        return self.model is not None
+
+    def model_key(self, model_size=None):
+        """
+        Cache key for the currently configured model (or another size with
+        the same settings): (model_size, device, compute_type, cpu_threads,
+        num_workers).
+        """
+        return model_key_for(self.config, model_size)
+
+    def needs_reload(self):
+        return self.model is None or self.current_key != self.model_key()
+
+    def available_models(self):
+        """
+        Model sizes loaded with the current settings, up to the configured
+        size. These are the tiers the latency policy can pick from without
+        waiting for a load.
+        """
+        settings = self.model_key()[1:]
+        max_tier = model_tier(self.config.get("model_size"))
+        sizes = {
+            key[0] for key in self.cache.keys()
+            if key[1:] == settings and model_tier(key[0]) <= max_tier
+        }
+        if self.current_model_size:
+            sizes.add(self.current_model_size)
+        return sizes
+
+    def preload(self, model_size):
+        """
+        Loads another model size into the cache on a background thread
+        without making it the active model.
+        """
+        key = self.model_key(model_size)
+        if key in self.cache:
+            return
+
+        def run():
+            with self._load_lock:
+                if key not in self.cache:
+                    self._create_model(key)
+
+        threading.Thread(target=run, daemon=True).start()
 
     def load_model(self):
-        model_size = self.config.get("model_size")
-        device = self.config.get("device")
+        """
+        Makes the configured model the active one, loading it if it is not
+        cached. The previous model keeps serving transcribe() calls until the
+        new one is ready, so this is safe to run from a background thread.
+        """
+        with self._load_lock:
+            self._load_model()
+        return self.model is not None
+
+    def _load_model(self):
+        key = self.model_key()
+        model_size, device = key[:2]
         
-        if self.model and self.current_model_size == model_size:
+        if self.model and self.current_key == key:
             return # No change needed
 
+        model = self.cache.get(key)
+        if model is not None:
+            print(f"Using cached model '{model_size}' on {device}.")
+        else:
+            model = self._create_model(key)
+            if model is None:
+                return
+
+        # Swap in one assignment: in-flight calls keep their own reference
+        self.model = model
+        self.current_key = key
+        self.current_model_size = model_size
+
+    def unload(self):
+        """
+        Frees the active model and all cached ones (idle timeout). A decode
+        in progress keeps its own reference and finishes normally; the next
+        load_model() or transcribe() loads the model again.
+        """
+        with self._load_lock:
+            self.model = None
+            self.current_key = None
+            self.current_model_size = None
+            self.cache.clear()
+        # CTranslate2 releases memory when the last reference is dropped
+        gc.collect()
+
+    def _create_model(self, key):
+        model_size, device, compute_type, cpu_threads, num_workers = key
+
+        # Heavy import (CTranslate2, tokenizers) deferred until first load
+        from faster_whisper import WhisperModel
+
         print(f"Loading Whisper model '{model_size}' on {device}...")
         try:
-            # Cleanup old model if exists to free memory
-            if self.model:
-                del self.model
-                self.model = None
-            
-            compute_type = "float16" if device == "cuda" else "int8"
-            
-            self.model = WhisperModel(
+            model = WhisperModel(
                 model_size, 
                 device=device, 
-                compute_type=compute_type
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers
             )
-            self.current_model_size = model_size
+            self.cache.put(key, model)
             print(f"Model '{model_size}' loaded successfully.")
+            return model
             
         except Exception as e:
             print(f"Error loading model: {e}. Falling back to CPU/int8.")
+            fallback_key = (model_size, "cpu", "int8", cpu_threads, num_workers)
+            model = self.cache.get(fallback_key)
+            if model is not None:
+                return model
             try:
-                self.model = WhisperModel(model_size, device="cpu", compute_type="int8")
-                self.current_model_size = model_size
+                model = WhisperModel(
+                    model_size, device="cpu", compute_type="int8",
+                    cpu_threads=cpu_threads, num_workers=num_workers
+                )
+                self.cache.put(fallback_key, model)
+                return model
             except Exception as e2:
                 print(f"CRITICAL: Failed to load fallback model: {e2}")
+                return None
 
-    def transcribe(self, audio_path):
-        if not self.model:
-            print("Model not loaded, attempting to load...")
-            self.load_model()
-            if not self.model:
-                return "Error: Model failed to load."
+    def load_audio_file(self, path):
+        """
+        Decodes any audio/video file supported by faster-whisper (PyAV) into
+        a 16 kHz mono float32 buffer, so files go through the same VAD and
+        in-memory path as recordings.
+        """
+        from faster_whisper import decode_audio
+        return decode_audio(path, sampling_rate=MODEL_SAMPLE_RATE)
 
-        if not os.path.exists(audio_path):
-            return ""
+    def prepare_audio(self, audio, sample_rate=None):
+        """
+        Converts a captured buffer into the model input format
+        (1-D float32 at 16 kHz). sample_rate is the rate of the given buffer
+        (defaults to the capture rate from config). File paths are passed
+        through unchanged.
+        """
+        if isinstance(audio, str):
+            return audio
 
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        sample_rate = sample_rate or self.config.get("sample_rate")
+        if sample_rate and sample_rate != MODEL_SAMPLE_RATE:
+            from scipy.signal import resample_poly
+            gcd = np.gcd(int(sample_rate), MODEL_SAMPLE_RATE)
+            audio = resample_poly(
+                audio, MODEL_SAMPLE_RATE // gcd, int(sample_rate) // gcd
+            ).astype(np.float32)
+        return audio
+
+    def apply_vad(self, audio):
+        """
+        Trims dead air from a prepared 16 kHz buffer before inference.
+        Returns (audio, stats); audio is empty if the clip is all silence.
+        """
+        audio, stats = trim_silence(
+            audio,
+            MODEL_SAMPLE_RATE,
+            threshold_db=self.config.get("vad_threshold_db"),
+            pad_ms=self.config.get("vad_pad_ms"),
+            min_speech_ms=self.config.get("vad_min_speech_ms"),
+            max_pause_ms=self.config.get("vad_max_pause_ms")
+        )
+        self.last_vad_stats = stats
+        if stats["silent"]:
+            print(f"VAD: {stats['input_s']:.2f}s of silence, skipping inference")
+        elif stats["removed_s"] > 0:
+            print(f"VAD: removed {stats['removed_s']:.2f}s of {stats['input_s']:.2f}s")
+        return audio, stats
+
+    def transcribe(self, audio, initial_prompt=None, trace=None, sample_rate=None):
+        """
+        Transcribes either an in-memory buffer (numpy array captured by
+        AudioRecorder) or a path to an audio file. initial_prompt carries
+        the text of previous chunks when streaming; trace (see core.tracing)
+        receives per-stage marks; sample_rate is the rate of an in-memory
+        buffer if it differs from the capture rate in config.
+        """
         try:
-            # Get language from config
-            language = self.config.get("language")
-            if language == "auto":
-                language = None
-                
-            segments, info = self.model.transcribe(
-                audio_path, 
-                beam_size=5, 
-                language=language
-            )
-            
-            text = ""
-            for segment in segments:
-                text += segment.text
-            
-            return text.strip()
-            
+            return "".join(self.transcribe_iter(audio, initial_prompt, trace, sample_rate)).strip()
         except Exception as e:
             print(f"Error during transcription: {e}")
             # If error might be due to model (e.g. CUDA OOM), maybe reload?
             # For now just re-raise or return error
             return f"[Error: {e}]"
+
+    def transcribe_iter(self, audio, initial_prompt=None, trace=None, sample_rate=None):
+        """
+        Same as transcribe(), but yields the text of each segment as soon as
+        the decoder produces it (progressive output). Segment texts carry
+        their own leading space; joining them gives the full transcript.
+        Raises on failure instead of returning an error string.
+        """
+        if not self.model:
+            print("Model not loaded, attempting to load...")
+            self.load_model()
+        # Local reference: a background hot-swap may replace self.model
+        model = self.model
+        if not model:
+            raise RuntimeError("Model failed to load")
+        if trace:
+            trace.mark("model_ready")
+
+        if audio is None:
+            return
+        if isinstance(audio, str) and not os.path.exists(audio):
+            return
+
+        audio = self.prepare_audio(audio, sample_rate)
+        if not isinstance(audio, str):
+            if self.config.get("vad_enabled"):
+                audio, stats = self.apply_vad(audio)
+                if trace:
+                    trace.annotate(vad_removed_s=round(stats["removed_s"], 3))
+            if audio.size == 0:
+                return
+        if trace:
+            trace.mark("audio_prepared")
+
+        # Get language from config; "auto" reuses the session's language when sure
+        language = self.config.get("language")
+        sticky = False
+        if language == "auto":
+            language = self.languages.sticky()
+            sticky = language is not None
+            if not sticky:
+                language = self.detect_language(model, audio)
+            if trace:
+                trace.annotate(language=language, language_sticky=sticky)
+
+        if self.use_long_form(audio):
+            self.last_model_size = self.current_model_size
+            yield from self._transcribe_long_form(model, audio, language, initial_prompt, trace, sticky)
+        else:
+            model_size = self.current_model_size
+            beam_size = self.config.get("beam_size")
+            temperature = None
+            audio_s = len(audio) / MODEL_SAMPLE_RATE if not isinstance(audio, str) else 0
+
+            if self.policy.enabled() and audio_s:
+                choice = self.policy.choose(audio_s, self.available_models())
+                cached = self.cache.get(self.model_key(choice["model_size"]))
+                if cached is not None:
+                    model, model_size = cached, choice["model_size"]
+                beam_size = choice["beam_size"]
+                temperature = choice["temperature"]
+                if trace:
+                    trace.annotate(policy=dict(choice, temperature=str(temperature)))
+
+            self.last_model_size = model_size
+            start = time.perf_counter()
+            yield from self._decode_iter(model, audio, language, initial_prompt, trace,
+                                         beam_size, temperature, sticky)
+            self.policy.record(model_size, beam_size, audio_s, time.perf_counter() - start)
+        if trace:
+            trace.mark("decode_done")
+
+    def detect_language(self, model, audio):
+        """
+        Detects the clip's language up front (timed for the stats) and
+        remembers it for the next clips. Returns None if the model can't
+        detect separately (older faster-whisper, file input); the decoder
+        then detects and _decode_iter records the result.
+        """
+        if isinstance(audio, str) or not hasattr(model, "detect_language"):
+            return None
+        start = time.perf_counter()
+        try:
+            language, probability, _ = model.detect_language(audio)
+        except Exception as e:
+            print(f"Language detection failed: {e}")
+            return None
+        self.languages.detected(language, probability, time.perf_counter() - start)
+        return language
+
+    def _decode(self, model, audio, language, initial_prompt=None, trace=None,
+                beam_size=None, temperature=None, sticky=False):
+        return "".join(self._decode_iter(
+            model, audio, language, initial_prompt, trace, beam_size, temperature, sticky
+        ))
+
+    def _decode_iter(self, model, audio, language, initial_prompt=None, trace=None,
+                     beam_size=None, temperature=None, sticky=False):
+        """
+        Yields segment texts. With sticky (a remembered, not detected,
+        language) the first segment is checked and the clip is decoded
+        again with detection if it looks like the wrong language.
+        """
+        options = {}
+        if temperature is not None:
+            options["temperature"] = temperature
+        start = time.perf_counter()
+        segments, info = model.transcribe(
+            audio, 
+            beam_size=beam_size or self.config.get("beam_size"),
+            language=language,
+            initial_prompt=initial_prompt,
+            **options
+        )
+        if language is None and info is not None:
+            # Detection ran eagerly inside transcribe(); its time is an upper bound
+            self.languages.detected(
+                info.language, info.language_probability, time.perf_counter() - start
+            )
+        if trace:
+            # Feature extraction + language detection happen eagerly
+            trace.mark("decode_started")
+        
+        # The generator decodes lazily, one segment per iteration
+        segments = iter(segments)
+        if sticky:
+            first = next(segments, None)
+            if first is None:
+                return
+            if self.languages.is_suspect(first):
+                print(f"Language '{language}' looks wrong for this clip, re-detecting")
+                self.languages.invalidate()
+                yield from self._decode_iter(
+                    model, audio, self.detect_language(model, audio),
+                    initial_prompt, trace, beam_size, temperature
+                )
+                return
+            yield first.text
+        for segment in segments:
+            yield segment.text
+
+    def use_long_form(self, audio):
+        if isinstance(audio, str) or not self.config.get("long_form_enabled"):
+            return False
+        # Short recordings decode faster in one pass than split up
+        return len(audio) >= self.config.get("long_form_threshold_s") * MODEL_SAMPLE_RATE
+
+    def _transcribe_long_form(self, model, audio, language, initial_prompt=None, trace=None, sticky=False):
+        """
+        Splits a long recording at pauses into ~long_form_chunk_s chunks and
+        yields each chunk's text in the original order as soon as it is
+        ready. With one worker the chunks decode in order, each prompted
+        with the text before it. With long_form_workers > 1 the chunks after
+        the first decode in parallel on the model's replicas, without that
+        prompt, which costs some accuracy at chunk edges (names, casing,
+        punctuation style).
+        """
+        bounds = split_at_pauses(audio, MODEL_SAMPLE_RATE, self.config.get("long_form_chunk_s"))
+        workers = max(1, min(len(bounds) - 1, self.config.get("long_form_workers")))
+        print(f"Long-form: {len(bounds)} chunks on {workers} workers")
+        if trace:
+            trace.annotate(long_form_chunks=len(bounds))
+            trace.mark("decode_started")
+
+        # The language is settled once per clip, on the first chunk, before
+        # the others fan out: a remembered language is checked there, and
+        # without one the decoder's detection there is reused for the rest.
+        # Otherwise every chunk would re-check or re-detect on its own.
+        start, end = bounds[0]
+        prompt = self._decode(model, audio[start:end], language, initial_prompt, sticky=sticky).strip()
+        if prompt:
+            yield " " + prompt
+        if sticky or language is None:
+            language = self.languages.language or language
+        prompt = prompt or initial_prompt
+        bounds = bounds[1:]
+
+        if workers == 1:
+            for start, end in bounds:
+                text = self._decode(model, audio[start:end], language, prompt).strip()
+                if text:
+                    prompt = text
+                    yield " " + text
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            texts = executor.map(
+                lambda b: self._decode(model, audio[b[0]:b[1]], language).strip(),
+                bounds
+            )
+            for text in texts:
+                if text:
+                    yield " " + text
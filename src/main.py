@@ -1,15 +1,28 @@
 import sys
-import os
+import multiprocessing
+import queue
+import threading
 import time
-from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
+from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QMessageBox
 from PyQt6.QtGui import QIcon, QAction, QPixmap, QPainter, QColor
-from PyQt6.QtCore import QThread, pyqtSignal, QObject, Qt
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal, QObject, Qt
 
 from ui.overlay_window import FloatingButton
+from ui.history_dialog import HistoryDialog
 from core.audio_recorder import AudioRecorder
+from core.devices import DeviceMonitor
 from core.transcriber import Transcriber
+from core.remote_transcriber import RemoteTranscriber
+from core.inference_process import ProcessTranscriber
+from core.streaming import StreamingTranscriber
 from core.input_handler import InputHandler
+from core.postprocess import PostProcessor
 from core.config_manager import ConfigManager
+from core.tracing import LatencyTracer
+from core.history import HistoryStore
+from core.autotune import Autotuner
+from core.sysinfo import get_rss_mb
+from core.diagnostics import Diagnostics
 
 # Bridge to safely handle hotkeys from non-Qt threads
 class HotkeyBridge(QObject):
@@ -17,48 +30,236 @@ class HotkeyBridge(QObject):
 
     def __init__(self):
         super().__init__()
+        self.press_time = None
 
-class TranscribeWorker(QObject):
-    finished = pyqtSignal(str)
-    error = pyqtSignal(str)
+    def trigger(self):
+        # Called from the keyboard hook thread; remember when the key was hit
+        # so traces include the queued hop into the GUI thread.
+        self.press_time = time.perf_counter()
+        self.hotkey_pressed.emit()
+
+    def take_press_time(self):
+        press_time, self.press_time = self.press_time, None
+        return press_time
+
+class RecorderBridge(QObject):
+    """
+    Delivers the recorder's audio-thread callbacks to the GUI thread.
+    """
+    buffer_full = pyqtSignal()
 
-    def __init__(self, transcriber, audio_path):
+class ModelLoader(QObject):
+    """
+    Loads the Whisper model on a daemon thread so the overlay and hotkey
+    are usable immediately. Emits 'loaded' (in the GUI thread) when done.
+    """
+    loaded = pyqtSignal(bool)
+
+    def __init__(self, transcriber):
         super().__init__()
         self.transcriber = transcriber
-        self.audio_path = audio_path
+        self.running = False
 
-    def run(self):
+    def start(self):
+        self.running = True
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
         try:
-            if os.path.exists(self.audio_path):
-                # Small delay to ensure file is written and flushed
-                time.sleep(0.2)
-                text = self.transcriber.transcribe(self.audio_path)
-                self.finished.emit(text)
-            else:
-                self.error.emit("Audio file not found")
+            ok = self.transcriber.load_model()
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            ok = False
+        self.running = False
+        self.loaded.emit(ok)
+
+class AutotuneWorker(QObject):
+    """
+    Runs hardware calibration (core.autotune) on a daemon thread.
+    """
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(object) # dict of best settings, or None
+
+    def __init__(self, config_manager):
+        super().__init__()
+        self.config = config_manager
+        self.running = False
+
+    def start(self, clip, sample_rate):
+        self.running = True
+        threading.Thread(target=self._run, args=(clip, sample_rate), daemon=True).start()
+
+    def _run(self, clip, sample_rate):
+        try:
+            tuner = Autotuner(self.config, clip, sample_rate, progress=self.progress.emit)
+            result = tuner.run()
         except Exception as e:
-            self.error.emit(str(e))
+            self.progress.emit(f"Calibration failed: {e}")
+            result = None
+        self.running = False
+        self.finished.emit(result)
+
+class TranscriptionJob:
+    """
+    One recorded utterance waiting for (or going through) transcription.
+    """
+    _next_id = 1
+
+    def __init__(self, audio, stream=None, trace=None, duration_s=None, audio_path=None):
+        self.job_id = TranscriptionJob._next_id
+        TranscriptionJob._next_id += 1
+        # In-memory buffer from AudioRecorder (or a file path)
+        self.audio = audio
+        self.duration_s = duration_s
+        # Archived copy of the recording (save_audio_files), linked from history
+        self.audio_path = audio_path
+        # Segments are pasted as they are decoded (progressive_output)
+        self.progressive = False
+        self.segments_pasted = 0
+        # Streaming session that already decoded most of the audio
+        self.stream = stream
+        self.trace = trace
+        # Model that actually decoded it, for the history
+        self.model_size = None
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+
+    @property
+    def wait_s(self):
+        if self.started_at is None:
+            return time.perf_counter() - self.enqueued_at
+        return self.started_at - self.enqueued_at
+
+class TranscribeWorker(QObject):
+    """
+    Long-lived inference worker. Lives in its own QThread for the whole
+    session and processes jobs from a FIFO queue one at a time, so results
+    come back in recording order while new recordings can already start.
+    """
+    finished = pyqtSignal(object, str)   # job, text
+    error = pyqtSignal(object, str)      # job, message
+    segment_ready = pyqtSignal(object, str) # job, segment text (progressive output)
+    queue_changed = pyqtSignal(int)      # jobs queued or in progress
+
+    def __init__(self, transcriber):
+        super().__init__()
+        self.transcriber = transcriber
+        self.jobs = queue.Queue()
+        self.busy = False
+        self.last_wait_s = 0.0
+
+    def depth(self):
+        return self.jobs.qsize() + (1 if self.busy else 0)
+
+    def submit(self, job):
+        # Thread-safe; called from the GUI thread
+        self.jobs.put(job)
+        self.queue_changed.emit(self.depth())
+
+    def stop(self):
+        self.jobs.put(None)
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+
+            self.busy = True
+            job.started_at = time.perf_counter()
+            self.last_wait_s = job.wait_s
+            if job.trace:
+                job.trace.mark("worker_started")
+                job.trace.annotate(queue_wait_s=round(job.wait_s, 3))
+            try:
+                if job.stream:
+                    text = job.stream.finish(job.audio, trace=job.trace)
+                elif job.progressive:
+                    # Hand each segment to the GUI as soon as it is decoded
+                    parts = []
+                    for segment in self.transcriber.transcribe_iter(job.audio, trace=job.trace):
+                        parts.append(segment)
+                        self.segment_ready.emit(job, segment)
+                    text = "".join(parts).strip()
+                else:
+                    # transcribe_iter() raises, so failures go to 'error', never into the text
+                    text = "".join(self.transcriber.transcribe_iter(job.audio, trace=job.trace)).strip()
+                job.model_size = self.transcriber.last_model_size
+                signal, payload = self.finished, text
+            except Exception as e:
+                signal, payload = self.error, str(e)
+
+            # Drop our reference to the audio buffer as soon as possible, and
+            # clear 'busy' before emitting so the GUI sees the real depth
+            job.audio = None
+            job.stream = None
+            self.busy = False
+            signal.emit(job, payload)
+            self.queue_changed.emit(self.depth())
 
 class AppController:
-    def __init__(self, app):
+    def __init__(self, app, config_manager=None, audio_source=None):
+        # Both are injectable for headless soak tests (benchmarks/soak_test.py)
         self.app = app
-        self.config = ConfigManager()
+        self.config = config_manager or ConfigManager()
         
-        self.recorder = AudioRecorder(self.config)
-        # Transcriber gets config to manage model loading dynamically
-        self.transcriber = Transcriber(self.config) 
+        self.recorder = AudioRecorder(self.config, source=audio_source)
+        # Optional always-open input stream with pre-roll
+        self.recorder.open_warm_stream()
+        # Input devices are enumerated off the GUI thread and cached; a
+        # stream that dies with its device is reopened (on_stream_lost)
+        self.device_monitor = DeviceMonitor(self.recorder)
+        self.device_monitor.refresh(rescan=False)
+        self.device_monitor.stream_lost.connect(self.on_stream_lost)
+        # Transcriber gets config to manage model loading dynamically.
+        # The model itself is loaded in the background (see ModelLoader).
+        # With 'server_url' set, a shared local inference server is used instead;
+        # with 'inference_process', a child process owns the model.
+        if self.config.get("server_url"):
+            self.transcriber = RemoteTranscriber(self.config)
+        elif self.config.get("inference_process"):
+            self.transcriber = ProcessTranscriber(self.config)
+        else:
+            self.transcriber = Transcriber(self.config) 
         self.input_handler = InputHandler(self.config)
         
+        # Dictionary replacements / spoken punctuation before any output.
+        # A large dictionary is compiled in the background at startup.
+        self.postprocessor = PostProcessor(self.config)
+        threading.Thread(target=self.postprocessor.refresh, daemon=True).start()
+        
+        # Per-stage latency traces (rotating JSONL log + rolling p50/p95)
+        self.tracer = LatencyTracer(
+            self.config.get("trace_log"),
+            enabled=self.config.get("trace_enabled")
+        )
+        self.trace = None
+        
+        # Optional long-session resource telemetry (leak detection)
+        self.diagnostics = None
+        self.set_diagnostics(self.config.get("diagnostics_enabled"))
+        
+        # Searchable transcription history (written on a background thread)
+        self.history = HistoryStore(
+            self.config.get("history_file"),
+            limit=self.config.get("history_limit")
+        )
+        self.history_dialog = None
+        
         # Connect config signals for non-UI updates
         self.config.config_changed.connect(self.on_config_changed)
         
         # UI Setup
-        self.ui = FloatingButton(self.config)
+        self.ui = FloatingButton(self.config, self.device_monitor)
         self.ui.clicked.connect(self.toggle_recording)
+        self.ui.calibrate_requested.connect(self.start_autotune)
         
         # Hotkey Bridge (CRITICAL for thread safety)
         self.bridge = HotkeyBridge()
         self.bridge.hotkey_pressed.connect(self.toggle_recording, Qt.ConnectionType.QueuedConnection)
+        self.recorder_bridge = RecorderBridge()
+        self.recorder_bridge.buffer_full.connect(self.on_recording_full, Qt.ConnectionType.QueuedConnection)
+        self.recorder.on_buffer_full = self.recorder_bridge.buffer_full.emit
         
         # Tray Icon
         pixmap = QPixmap(32, 32)
@@ -73,6 +274,12 @@ class AppController:
         self.tray_icon = QSystemTrayIcon(QIcon(pixmap), self.app)
         self.tray_icon.setToolTip("FreeTranscriber")
         tray_menu = QMenu()
+        history_action = QAction("History", self.app)
+        history_action.triggered.connect(self.show_history)
+        tray_menu.addAction(history_action)
+        stats_action = QAction("Latency Stats", self.app)
+        stats_action.triggered.connect(self.show_latency_stats)
+        tray_menu.addAction(stats_action)
         quit_action = QAction("Exit", self.app)
         quit_action.triggered.connect(self.quit_app)
         tray_menu.addAction(quit_action)
@@ -82,97 +289,360 @@ class AppController:
         # Setup Initial Hotkey
         self.input_handler.register_hotkey(
             self.config.get("hotkey"), 
-            lambda: self.bridge.hotkey_pressed.emit()
+            self.bridge.trigger
         )
         
-        self.processing = False
-        self.current_audio_path = None
-        self.thread = None
-        self.worker = None
+        self.stream = None
+        # Last recording, kept as the reference clip for calibration
+        self.last_audio = None
+        
+        self.autotuner = AutotuneWorker(self.config)
+        self.autotuner.progress.connect(self.on_autotune_progress)
+        self.autotuner.finished.connect(self.on_autotune_finished)
+        
+        # One persistent inference worker + thread for the whole session
+        self.thread = QThread()
+        self.worker = TranscribeWorker(self.transcriber)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.run)
+        self.worker.finished.connect(self.on_transcription_finished)
+        self.worker.error.connect(self.on_error)
+        self.worker.segment_ready.connect(self.on_segment_ready)
+        self.worker.queue_changed.connect(self.on_queue_changed)
+        self.thread.finished.connect(self.worker.deleteLater)
+        self.thread.finished.connect(self.thread.deleteLater)
+        self.thread.start()
+        self.app.aboutToQuit.connect(self.shutdown)
+        
+        # Warm up the model without blocking the GUI. Recordings made before
+        # it is ready are queued: the worker waits for the load to finish.
+        self.ui.set_warming_up(True)
+        self.model_loader = ModelLoader(self.transcriber)
+        self.model_loader.loaded.connect(self.on_model_loaded)
+        self.model_loader.start()
+        
+        # Idle unloading and the memory readout in the tray tooltip
+        self.last_used = time.monotonic()
+        self.idle_timer = QTimer()
+        self.idle_timer.timeout.connect(self.check_idle)
+        self.idle_timer.start(30000)
+
+    def on_model_loaded(self, ok):
+        self.ui.set_warming_up(False)
+        self.update_tray_tooltip()
+        if not ok:
+            print("Model failed to load; will retry on next transcription.")
+        else:
+            self.preload_fast_model()
+
+    def preload_fast_model(self):
+        # With a latency target, keep the fast tier resident for short clips
+        if self.config.get("latency_target_ms") and isinstance(self.transcriber, Transcriber):
+            fast_model = self.config.get("latency_fast_model")
+            if fast_model != self.config.get("model_size"):
+                self.transcriber.preload(fast_model)
+
+    def ensure_model_loading(self):
+        # Predictive reload after an idle unload: starts on the hotkey press,
+        # so loading overlaps with the user speaking rather than with decoding
+        if not self.transcriber.is_loaded() and not self.model_loader.running:
+            print("Reloading model...")
+            self.ui.set_warming_up(True)
+            self.model_loader.start()
+
+    def check_idle(self):
+        timeout_min = self.config.get("model_idle_unload_min")
+        idle_s = time.monotonic() - self.last_used
+        # A RemoteTranscriber holds no model here; the server manages its own
+        if (timeout_min and idle_s >= timeout_min * 60
+                and not isinstance(self.transcriber, RemoteTranscriber)
+                and self.transcriber.is_loaded() and not self.model_loader.running
+                and not self.recorder.recording and not self.worker.depth()):
+            print(f"Idle for {idle_s / 60:.0f} min, unloading model.")
+            self.transcriber.unload()
+        self.update_tray_tooltip()
+
+    def update_tray_tooltip(self):
+        if self.autotuner.running:
+            return # Shows calibration progress
+        if self.transcriber.is_loaded():
+            model = self.transcriber.current_key[0] if self.transcriber.current_key else "remote"
+        else:
+            model = "model unloaded"
+        rss = get_rss_mb()
+        memory = f"{rss:.0f} MB" if rss is not None else "n/a"
+        if isinstance(self.transcriber, ProcessTranscriber) and self.transcriber.pid:
+            worker_rss = get_rss_mb(self.transcriber.pid)
+            if worker_rss is not None:
+                memory += f" + worker {worker_rss:.0f} MB"
+        self.tray_icon.setToolTip(f"FreeTranscriber - {model} - {memory}")
 
     def on_config_changed(self, key, value):
         if key == "hotkey":
             self.input_handler.update_hotkey(value)
-        # model_size/device changes are handled by Transcriber internally on next run
-        # input_device_id changes are handled by Recorder internally on next run
+        elif key in ("model_size", "device", "compute_type", "cpu_threads",
+                     "num_workers", "long_form_enabled", "long_form_workers"):
+            # Hot-swap: the current model keeps serving while the new one loads
+            if self.transcriber.needs_reload():
+                self.model_loader.start()
+        elif key in ("latency_target_ms", "latency_fast_model"):
+            if self.transcriber.is_loaded():
+                self.preload_fast_model()
+        elif key == "history_limit":
+            self.history.set_limit(value)
+        elif key == "model_cache_mb" and isinstance(self.transcriber, Transcriber):
+            self.transcriber.cache.set_budget(value)
+        elif key in ("diagnostics_enabled", "diagnostics_interval_s", "diagnostics_log"):
+            self.set_diagnostics(self.config.get("diagnostics_enabled"))
+        elif key in ("input_device_id", "sample_rate", "keep_stream_open", "preroll_ms"):
+            # Without keep_stream_open this only matters on the next recording
+            self.recorder.restart_stream()
+
+    def start_autotune(self):
+        if self.autotuner.running:
+            return
+        if not isinstance(self.transcriber, Transcriber):
+            self.tray_icon.showMessage(
+                "FreeTranscriber",
+                "Auto-tune is only available when the model runs in the app (no server_url, inference_process off)."
+            )
+            return
+        if self.last_audio is None:
+            self.tray_icon.showMessage("FreeTranscriber", "Dictate a sentence or two first, then run auto-tune.")
+            return
+        self.autotuner.start(self.last_audio, self.config.get("sample_rate"))
+
+    def on_autotune_progress(self, message):
+        print(message)
+        self.tray_icon.setToolTip(f"FreeTranscriber - {message}")
+
+    def on_autotune_finished(self, result):
+        self.update_tray_tooltip()
+        if result:
+            # compute_type/cpu_threads changes hot-swap the model (on_config_changed)
+            self.config.set_many(dict(result, autotune_done=True))
+            self.tray_icon.showMessage(
+                "FreeTranscriber",
+                f"Tuned: {result['compute_type']}, {result['cpu_threads'] or 'auto'} threads, beam {result['beam_size']}"
+            )
+            return
+
+        # First-run calibration retries on later dictations, a few times
+        attempts = self.config.get("autotune_attempts") + 1
+        give_up = attempts >= self.config.get("autotune_max_attempts")
+        self.config.set_many({"autotune_attempts": attempts,
+                              "autotune_done": give_up or self.config.get("autotune_done")})
+        retry = ("Run it from Settings when you like." if give_up
+                 else "It will be retried after a later dictation.")
+        self.tray_icon.showMessage("FreeTranscriber", f"Auto-tune failed; current settings kept. {retry}")
+
+    def maybe_autotune(self, duration_s):
+        # First-run calibration, once a long enough real dictation exists.
+        # Skipped silently while the model runs elsewhere (server or process);
+        # it still happens once inference moves back into the app.
+        if (self.config.get("autotune_on_first_run") and not self.config.get("autotune_done")
+                and isinstance(self.transcriber, Transcriber)
+                and duration_s and duration_s >= 3):
+            self.start_autotune()
+
+    def show_history(self):
+        if not self.history_dialog:
+            self.history_dialog = HistoryDialog(self.history)
+        self.history_dialog.show()
+        self.history_dialog.raise_()
+        self.history_dialog.activateWindow()
+
+    def show_latency_stats(self):
+        text = self.tracer.format_summary()
+        if isinstance(self.transcriber, Transcriber) and self.config.get("language") == "auto":
+            text += "\n\n" + self.transcriber.languages.format_stats()
+        if self.diagnostics:
+            text += "\n\n" + self.diagnostics.summary()
+        QMessageBox.information(None, "FreeTranscriber Latency", text)
+
+    def set_diagnostics(self, enabled):
+        if self.diagnostics:
+            self.diagnostics.stop()
+            self.diagnostics = None
+        if enabled:
+            self.diagnostics = Diagnostics(
+                self.config.get("diagnostics_log"),
+                interval_s=self.config.get("diagnostics_interval_s"),
+                # The inference process (inference_process) isn't in this RSS
+                child_pid=lambda: getattr(self.transcriber, "pid", None)
+            )
+            self.diagnostics.start()
 
     def quit_app(self):
         self.ui.close()
         self.app.quit()
 
+    def shutdown(self):
+        # Runs on aboutToQuit, whichever Exit action (tray or overlay) was used
+        if self.recorder.recording:
+            self.recorder.stop_recording()
+        self.recorder.close()
+        self.worker.stop()
+        self.thread.quit()
+        # Don't hang on exit if a long decode is still running
+        self.thread.wait(3000)
+        if isinstance(self.transcriber, ProcessTranscriber):
+            self.transcriber.close()
+        self.set_diagnostics(False)
+        self.history.close()
+        self.tracer.close()
+        self.config.flush()
+
     def toggle_recording(self):
         # This now always runs in the Main GUI Thread thanks to the bridge
-        if self.processing:
-            return 
+        # Recording is never blocked by decoding: finished recordings are
+        # queued on the worker and pasted in order.
+        press_time = self.bridge.take_press_time()
 
+        self.last_used = time.monotonic()
         if not self.recorder.recording:
             print("Action: Start Recording")
-            self.recorder.start_recording()
+            self.ensure_model_loading()
+            self.trace = self.tracer.start(start_time=press_time)
+            self.trace.mark("dispatched")
+            self.recorder.start_recording(trace=self.trace)
             self.ui.set_recording(True)
+            if self.recorder.recording and self.config.get("streaming_mode"):
+                self.stream = StreamingTranscriber(self.transcriber, self.recorder, self.config)
+                self.stream.start()
         else:
             print("Action: Stop Recording")
-            audio_path = self.recorder.stop_recording()
-            if audio_path:
-                self.start_transcription(audio_path)
+            trace, self.trace = self.trace, None
+            trace.mark("stop_pressed", press_time)
+            trace.mark("stop_dispatched")
+            audio = self.recorder.stop_recording(trace=trace)
+            stream, self.stream = self.stream, None
+            if audio is not None:
+                self.last_audio = audio
+                duration_s = round(len(audio) / self.config.get("sample_rate"), 3)
+                trace.annotate(
+                    duration_s=duration_s,
+                    model=self.config.get("model_size"),
+                    streaming=stream is not None
+                )
+                self.start_transcription(audio, stream, trace, duration_s,
+                                         audio_path=self.recorder.last_audio_path)
             else:
-                self.ui.set_recording(False)
+                if stream:
+                    stream.cancel()
+                self.update_ui_state()
 
-    def start_transcription(self, audio_path):
-        self.processing = True
-        self.ui.set_processing(True)
-        self.current_audio_path = audio_path
-        
-        # Cleanup previous thread if exists
-        if self.thread and self.thread.isRunning():
-            self.thread.quit()
-            self.thread.wait()
+    def start_transcription(self, audio, stream=None, trace=None, duration_s=None, audio_path=None):
+        if trace:
+            trace.mark("job_enqueued")
+        job = TranscriptionJob(audio, stream, trace, duration_s, audio_path)
+        job.progressive = self.config.get("progressive_output") and self.config.get("type_text")
+        self.worker.submit(job)
+        self.update_ui_state()
 
-        self.thread = QThread()
-        self.worker = TranscribeWorker(self.transcriber, audio_path)
-        self.worker.moveToThread(self.thread)
-        
-        self.thread.started.connect(self.worker.run)
-        self.worker.finished.connect(self.on_transcription_finished)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.error.connect(self.on_error)
-        self.worker.error.connect(self.thread.quit)
-        
-        self.thread.start()
+    def update_ui_state(self):
+        # Recording takes precedence; otherwise show whether jobs are pending
+        if self.recorder.recording:
+            self.ui.set_recording(True)
+        elif self.worker.depth():
+            self.ui.set_processing(True)
+        else:
+            self.ui.set_recording(False)
+
+    def on_queue_changed(self, depth):
+        self.ui.set_queue_info(depth, self.worker.last_wait_s)
+
+    def on_stream_lost(self):
+        print("Audio input stream stopped (device removed?), reopening.")
+        if self.recorder.recording:
+            # Keep what was captured up to the loss
+            self.toggle_recording()
+        # Re-enumerates devices, then reopens the warm stream (default
+        # device if the configured one is gone)
+        self.device_monitor.refresh()
+
+    def on_recording_full(self):
+        if not self.recorder.recording:
+            return
+        limit = self.config.get("max_recording_s")
+        print(f"Recording reached max_recording_s ({limit}s), stopping.")
+        self.tray_icon.showMessage(
+            "FreeTranscriber",
+            f"Recording stopped at the {limit}s limit (max_recording_s); it is being transcribed."
+        )
+        self.toggle_recording()
 
-    def on_error(self, message):
+    def on_error(self, job, message):
         print(f"Error during transcription: {message}")
-        self.processing = False
-        self.ui.set_recording(False)
-        self.ui.flash_success() # Or error state? For now just reset
+        if job.trace:
+            job.trace.annotate(error=message)
+            job.trace.finish()
+        self.finish_job()
 
-    def on_transcription_finished(self, text):
+    def finish_job(self, success=False):
+        if success and not self.recorder.recording and not self.worker.depth():
+            self.ui.flash_success()
+        else:
+            self.update_ui_state()
+
+    def on_segment_ready(self, job, segment):
+        # Queued signals arrive in decode order, and before 'finished'
+        segment = self.postprocessor.process(segment)
+        if job.segments_pasted == 0:
+            segment = segment.lstrip()
+            if job.trace:
+                job.trace.mark("first_segment")
+        if segment:
+            self.input_handler.type_text(segment)
+            job.segments_pasted += 1
+
+    def on_transcription_finished(self, job, text):
         print(f"Success: {text}")
+        self.last_used = time.monotonic()
+        trace = job.trace
+        if trace:
+            trace.mark("result_received")
+        
+        text = self.postprocessor.process(text).strip()
+        if trace:
+            trace.mark("postprocessed")
         
         if text:
             # Use Qt clipboard for thread safety and reliability
             if self.config.get("copy_to_clipboard"):
                 clipboard = self.app.clipboard()
                 clipboard.setText(text)
+                if trace:
+                    trace.mark("clipboard_set")
             
-            # Type text into active window
-            if self.config.get("type_text"):
-                self.input_handler.type_text(text)
+            # Type text into active window (unless it was pasted progressively)
+            if job.segments_pasted:
+                if trace:
+                    trace.mark("paste_sent")
+            elif self.config.get("type_text"):
+                self.input_handler.type_text(text, trace=trace)
             
-            # Visual feedback
-            self.ui.flash_success()
-        else:
-            self.ui.set_recording(False)
-            
-        self.processing = False
+            if self.config.get("save_history"):
+                self.history.add(
+                    text,
+                    duration_s=job.duration_s,
+                    model=job.model_size or self.config.get("model_size"),
+                    latency_s=round(time.perf_counter() - job.enqueued_at, 3),
+                    audio_path=job.audio_path
+                )
         
-        # Cleanup temp file
-        if self.current_audio_path and os.path.exists(self.current_audio_path):
-            try:
-                os.remove(self.current_audio_path)
-            except:
-                pass
+        # Visual feedback
+        self.finish_job(success=bool(text))
+        if text:
+            self.maybe_autotune(job.duration_s)
+        if trace:
+            # The latency policy may have picked another model than configured
+            trace.annotate(chars=len(text), model=job.model_size or self.config.get("model_size"))
+            trace.finish()
 
 if __name__ == "__main__":
+    # The inference process is spawned from this script (and from frozen builds)
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     app.setQuitOnLastWindowClosed(False)
     controller = AppController(app)
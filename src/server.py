@@ -0,0 +1,317 @@
+"""
+Local inference server: one warm Whisper model shared by many clients.
+
+    python src/server.py [--port 8765] [--config config.json]
+
+Endpoints (localhost only):
+    POST /transcribe   body = audio file (WAV, or any format PyAV decodes:
+                       mp3, ogg, m4a...), or raw PCM marked by
+                       ?sample_rate=16000 and/or ?format=f32|s16 (default
+                       f32, 16 kHz); undecodable bodies get HTTP 415
+                       optional ?prompt=... (initial prompt)
+    GET  /health       model status
+    GET  /metrics      request counters, queue depth, batch and latency stats
+
+Requests that arrive at the same time are micro-batched: the batcher waits
+up to server_batch_window_ms for as many requests as there are free decode
+slots (server_max_batch in total) and starts them concurrently on a model
+loaded with num_workers = server_max_batch, so CTranslate2 runs them in
+parallel instead of one after another. A slot is freed as soon as its
+request is done, so one long request doesn't hold back the others. When
+more than server_max_queue requests are waiting, new ones get HTTP 503.
+
+Point the overlay app at the server by setting "server_url" in config.json.
+"""
+import argparse
+import io
+import json
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import numpy as np
+
+from core.config_manager import ConfigManager
+from core.transcriber import Transcriber
+from core.tracing import percentile
+
+class UnsupportedAudio(ValueError):
+    pass
+
+def decode_request_audio(body, params):
+    """
+    Returns (float32 mono samples, sample_rate) for a WAV, other audio file
+    or raw PCM body. Raises UnsupportedAudio if the body can't be decoded.
+    """
+    if body[:4] == b"RIFF":
+        import scipy.io.wavfile as wav
+        sample_rate, data = wav.read(io.BytesIO(body))
+        if data.ndim > 1:
+            data = data.mean(axis=1)
+        if np.issubdtype(data.dtype, np.integer):
+            data = data.astype(np.float32) / np.iinfo(data.dtype).max
+        return data.astype(np.float32), int(sample_rate)
+
+    if "sample_rate" not in params and "format" not in params:
+        # Not marked as raw PCM: a compressed file (or a path's bytes, see
+        # RemoteTranscriber); decoded and resampled by PyAV
+        from faster_whisper import decode_audio
+        try:
+            return decode_audio(io.BytesIO(body), sampling_rate=16000), 16000
+        except Exception as e:
+            raise UnsupportedAudio(f"unsupported audio format ({e})") from None
+
+    sample_rate = int(params.get("sample_rate", ["16000"])[0])
+    fmt = params.get("format", ["f32"])[0]
+    if fmt == "s16":
+        data = np.frombuffer(body, dtype="<i2").astype(np.float32) / 32768.0
+    elif fmt == "f32":
+        data = np.frombuffer(body, dtype="<f4")
+    else:
+        raise UnsupportedAudio(f"Unsupported PCM format '{fmt}'")
+    return data, sample_rate
+
+class Request:
+    def __init__(self, audio, sample_rate, prompt):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.prompt = prompt
+        self.enqueued_at = time.perf_counter()
+        self.done = threading.Event()
+        self.cancelled = False # The client gave up (timeout); skip decoding
+        self.result = None
+        self.error = None
+
+class InferenceService:
+    """
+    Owns the shared Transcriber, the bounded request queue and the
+    micro-batching loop.
+    """
+
+    def __init__(self, config_manager):
+        self.config = config_manager
+        self.max_batch = max(1, self.config.get("server_max_batch"))
+        self.batch_window = self.config.get("server_batch_window_ms") / 1000.0
+
+        # One model replica per concurrently decoded request. Requests already
+        # run in parallel, so a long request's chunks decode one at a time
+        # instead of multiplying the threads competing for the cores.
+        self.config.set("num_workers", self.max_batch)
+        self.config.set("long_form_workers", 1)
+        # Clients may speak different languages: detect per request rather
+        # than reuse one client's language for the next (sticky language)
+        self.config.set("language_recheck_every", 0)
+        self.transcriber = Transcriber(self.config)
+
+        self.requests = queue.Queue(maxsize=max(1, self.config.get("server_max_queue")))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_batch)
+        # Free decode slots; each request holds one until it is done
+        self.slots = threading.Semaphore(self.max_batch)
+
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {"requests": 0, "completed": 0, "errors": 0, "rejected": 0,
+                         "cancelled": 0, "batches": 0}
+        self.in_flight = 0
+        self.latencies = deque(maxlen=500)
+        self.batch_sizes = deque(maxlen=500)
+
+    def start(self):
+        print("Loading model...")
+        if not self.transcriber.load_model():
+            raise RuntimeError("Failed to load model")
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+
+    def submit(self, request):
+        """
+        Queues a request; returns False if the queue is full (backpressure).
+        """
+        with self._lock:
+            self.counters["requests"] += 1
+        try:
+            self.requests.put_nowait(request)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.counters["rejected"] += 1
+            return False
+
+    def _batch_loop(self):
+        while True:
+            self.slots.acquire()
+            batch = [self.requests.get()]
+            deadline = time.perf_counter() + self.batch_window
+            # Gather more requests within the window, one free slot each
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0 or not self.slots.acquire(timeout=remaining):
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=max(0, deadline - time.perf_counter())))
+                except queue.Empty:
+                    self.slots.release()
+                    break
+
+            with self._lock:
+                self.counters["batches"] += 1
+                self.batch_sizes.append(len(batch))
+                self.in_flight += len(batch)
+
+            # Not waited for: the next batch starts as soon as slots free up
+            for request in batch:
+                self.executor.submit(self._run_one, request)
+
+    def _run_one(self, request):
+        if request.cancelled:
+            with self._lock:
+                self.in_flight -= 1
+                self.counters["cancelled"] += 1
+            self.slots.release()
+            return
+        try:
+            # transcribe_iter() raises on failure; transcribe() would return an error string
+            request.result = "".join(self.transcriber.transcribe_iter(
+                request.audio,
+                initial_prompt=request.prompt,
+                sample_rate=request.sample_rate
+            )).strip()
+        except Exception as e:
+            request.error = str(e)
+
+        elapsed = time.perf_counter() - request.enqueued_at
+        with self._lock:
+            self.in_flight -= 1
+            self.counters["errors" if request.error else "completed"] += 1
+            self.latencies.append(elapsed)
+        self.slots.release()
+        request.done.set()
+
+    def health(self):
+        key = self.transcriber.current_key
+        return {
+            "status": "ok" if self.transcriber.is_loaded() else "loading",
+            "model": key[0] if key else None,
+            "device": key[1] if key else None,
+        }
+
+    def metrics(self):
+        with self._lock:
+            latencies = list(self.latencies)
+            batch_sizes = list(self.batch_sizes)
+            data = dict(self.counters)
+            data["in_flight"] = self.in_flight
+        data.update({
+            "queue_depth": self.requests.qsize(),
+            "queue_limit": self.requests.maxsize,
+            "max_batch": self.max_batch,
+            "avg_batch_size": round(sum(batch_sizes) / len(batch_sizes), 2) if batch_sizes else 0,
+            "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+            "uptime_s": round(time.time() - self.started_at, 1),
+        })
+        return data
+
+class RequestHandler(BaseHTTPRequestHandler):
+    service = None # Set by main()
+    request_timeout = 600
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            self._send_json(200, self.service.health())
+        elif path == "/metrics":
+            self._send_json(200, self.service.metrics())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/transcribe":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            self._send_json(400, {"error": "empty body"})
+            return
+        body = self.rfile.read(length)
+        params = parse_qs(url.query)
+
+        try:
+            audio, sample_rate = decode_request_audio(body, params)
+        except UnsupportedAudio as e:
+            self._send_json(415, {"error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(400, {"error": f"bad audio: {e}"})
+            return
+
+        prompt = params.get("prompt", [None])[0]
+        request = Request(audio, sample_rate, prompt)
+        if not self.service.submit(request):
+            self._send_json(503, {"error": "server busy"}, {"Retry-After": "1"})
+            return
+
+        if not request.done.wait(self.request_timeout):
+            # Still queued: don't spend a decode on an answer nobody reads
+            request.cancelled = True
+            self._send_json(504, {"error": "timed out"})
+            return
+
+        if request.error:
+            self._send_json(500, {"error": request.error})
+        else:
+            self._send_json(200, {
+                "text": request.result,
+                "duration_s": round(len(audio) / sample_rate, 3),
+                "elapsed_s": round(time.perf_counter() - request.enqueued_at, 3),
+            })
+
+    def log_message(self, format, *args):
+        pass # Keep the console for app messages
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FreeTranscriber local inference server")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args(argv)
+
+    config = ConfigManager(args.config, read_only=True)
+    # The server itself always runs the model in-process
+    config.set("server_url", "")
+    config.set("streaming_mode", False)
+
+    service = InferenceService(config)
+    service.start()
+
+    RequestHandler.service = service
+    port = args.port or config.get("server_port")
+    server = ThreadingHTTPServer((args.host, port), RequestHandler)
+    server.daemon_threads = True
+    print(f"FreeTranscriber server listening on http://{args.host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
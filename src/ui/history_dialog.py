@@ -0,0 +1,81 @@
+import time
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QListWidget,
+    QListWidgetItem, QPushButton, QLabel, QApplication
+)
+from PyQt6.QtCore import Qt
+
+class HistoryDialog(QDialog):
+    def __init__(self, history_store, parent=None):
+        super().__init__(parent)
+        self.history = history_store
+        self.setWindowTitle("FreeTranscriber History")
+        self.resize(500, 450)
+        self.setStyleSheet("""
+            QDialog {
+                background-color: #2b2b2b;
+                color: #ffffff;
+            }
+            QLabel {
+                color: #aaaaaa;
+                font-size: 12px;
+            }
+            QLineEdit, QListWidget {
+                background: #333;
+                color: #fff;
+                border: 1px solid #555;
+                padding: 4px;
+            }
+            QListWidget::item {
+                padding: 4px;
+                border-bottom: 1px solid #444;
+            }
+            QListWidget::item:selected {
+                background: #555;
+            }
+        """)
+
+        layout = QVBoxLayout()
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Search...")
+        self.search_edit.textChanged.connect(self.refresh)
+        layout.addWidget(self.search_edit)
+
+        self.results = QListWidget()
+        self.results.setWordWrap(True)
+        self.results.itemDoubleClicked.connect(self.copy_item)
+        layout.addWidget(self.results)
+
+        self.status_label = QLabel("Double-click an entry to copy it to the clipboard.")
+        layout.addWidget(self.status_label)
+
+        btn_layout = QHBoxLayout()
+        btn_layout.addStretch()
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(self.accept)
+        close_btn.setStyleSheet("background: #555; color: white; padding: 6px 12px; border: none;")
+        btn_layout.addWidget(close_btn)
+        layout.addLayout(btn_layout)
+
+        self.setLayout(layout)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.search_edit.setFocus()
+        super().showEvent(event)
+
+    def refresh(self):
+        self.results.clear()
+        for entry in self.history.search(self.search_edit.text(), limit=200):
+            stamp = time.strftime("%d.%m %H:%M", time.localtime(entry["created_at"]))
+            item = QListWidgetItem(f"[{stamp}] {entry['text']}")
+            item.setData(Qt.ItemDataRole.UserRole, entry["text"])
+            if entry["audio_path"]:
+                item.setToolTip(f"Audio: {entry['audio_path']}")
+            self.results.addItem(item)
+
+    def copy_item(self, item):
+        QApplication.clipboard().setText(item.data(Qt.ItemDataRole.UserRole))
+        self.status_label.setText("Copied to clipboard.")
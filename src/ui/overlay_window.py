@@ -5,10 +5,12 @@ from .settings_dialog import SettingsDialog
 
 class FloatingButton(QWidget):
     clicked = pyqtSignal()
+    calibrate_requested = pyqtSignal()
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, device_monitor=None):
         super().__init__()
         self.config = config_manager
+        self.device_monitor = device_monitor
         
         # Connect config signals
         self.config.config_changed.connect(self.on_config_changed)
@@ -20,6 +22,8 @@ class FloatingButton(QWidget):
         self.is_recording = False
         self.is_processing = False
         self.is_success = False
+        self.is_warming_up = False
+        self.queue_depth = 0
         
         self._drag_pos = QPoint()
         self._press_pos = QPoint()
@@ -77,7 +81,8 @@ class FloatingButton(QWidget):
 
     def open_settings(self):
         if not self.settings_dialog:
-            self.settings_dialog = SettingsDialog(self.config, self)
+            self.settings_dialog = SettingsDialog(self.config, self, self.device_monitor)
+            self.settings_dialog.calibrate_requested.connect(self.calibrate_requested)
         
         # Center settings relative to widget or screen
         self.settings_dialog.show()
@@ -110,8 +115,7 @@ class FloatingButton(QWidget):
             else:
                 # Save new position after drag
                 pos = self.pos()
-                self.config.set("window_x", pos.x())
-                self.config.set("window_y", pos.y())
+                self.config.set_many({"window_x": pos.x(), "window_y": pos.y()})
                 
             self._is_dragging = False
             event.accept()
@@ -138,6 +142,19 @@ class FloatingButton(QWidget):
         self.setWindowOpacity(1.0 if state else self.idle_opacity)
         self.update()
 
+    def set_warming_up(self, state):
+        # Model is loading in the background; recording is still allowed
+        self.is_warming_up = state
+        self.setToolTip("Loading model..." if state else "")
+        self.update()
+
+    def set_queue_info(self, depth, last_wait_s):
+        # Jobs waiting for or in transcription; shown as a badge when > 1
+        self.queue_depth = depth
+        if not self.is_warming_up:
+            self.setToolTip(f"Queued: {depth} | last wait {last_wait_s:.1f}s" if depth else "")
+        self.update()
+
     def flash_success(self):
         self.is_success = True
         self.is_processing = False
@@ -161,6 +178,8 @@ class FloatingButton(QWidget):
             color = QColor(200, 50, 50)
         elif self.is_processing:
             color = QColor(255, 165, 0)
+        elif self.is_warming_up:
+            color = QColor(60, 80, 130)
         else:
             color = QColor(50, 50, 50)
             
@@ -181,6 +200,19 @@ class FloatingButton(QWidget):
              painter.setPen(pen)
              painter.drawLine(18, 30, 26, 38)
              painter.drawLine(26, 38, 42, 22)
+        elif self.is_warming_up:
+            # Hollow ring while the model loads
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.setPen(QPen(QColor(255, 255, 255), 3))
+            painter.drawEllipse(22, 22, 16, 16)
         else:
             painter.setPen(Qt.PenStyle.NoPen)
             painter.drawEllipse(22, 22, 16, 16)
+
+        # Queue badge: more than one utterance waiting for transcription
+        if self.queue_depth > 1:
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor(30, 120, 220))
+            painter.drawEllipse(38, 2, 20, 20)
+            painter.setPen(QColor(255, 255, 255))
+            painter.drawText(38, 2, 20, 20, Qt.AlignmentFlag.AlignCenter, str(min(self.queue_depth, 9)))
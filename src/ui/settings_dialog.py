@@ -2,13 +2,15 @@ from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, 
     QCheckBox, QSpinBox, QTabWidget, QWidget, QPushButton, QSlider
 )
-from PyQt6.QtCore import Qt
-import sounddevice as sd
+from PyQt6.QtCore import Qt, pyqtSignal
 
 class SettingsDialog(QDialog):
-    def __init__(self, config_manager, parent=None):
+    calibrate_requested = pyqtSignal()
+
+    def __init__(self, config_manager, parent=None, device_monitor=None):
         super().__init__(parent)
         self.config = config_manager
+        self.device_monitor = device_monitor
         self.setWindowTitle("FreeTranscriber Settings")
         self.setFixedSize(400, 500)
         self.setStyleSheet("""
@@ -89,6 +91,22 @@ class SettingsDialog(QDialog):
         self.sounds_check.toggled.connect(lambda v: self.config.set("use_sounds", v))
         self.sounds_check.setStyleSheet("color: white;")
         layout.addWidget(self.sounds_check)
+        
+        self.history_check = QCheckBox("Save History")
+        self.history_check.setChecked(self.config.get("save_history"))
+        self.history_check.toggled.connect(lambda v: self.config.set("save_history", v))
+        self.history_check.setStyleSheet("color: white;")
+        layout.addWidget(self.history_check)
+        
+        layout.addWidget(QLabel("History Size (entries):"))
+        self.history_spin = QSpinBox()
+        self.history_spin.setRange(10, 1000000)
+        self.history_spin.setSingleStep(1000)
+        self.history_spin.setValue(self.config.get("history_limit"))
+        # Lowering the limit evicts entries for good; don't apply half-typed values
+        self.history_spin.setKeyboardTracking(False)
+        self.history_spin.valueChanged.connect(lambda v: self.config.set("history_limit", v))
+        layout.addWidget(self.history_spin)
 
         layout.addStretch()
         widget.setLayout(layout)
@@ -101,26 +119,46 @@ class SettingsDialog(QDialog):
         layout.addWidget(QLabel("Input Device:"))
         self.device_combo = QComboBox()
         
-        # Populate devices
-        devices = sd.query_devices()
-        current_device_id = self.config.get("input_device_id")
-        
-        default_index = 0
-        for i, dev in enumerate(devices):
-            if dev['max_input_channels'] > 0:
-                name = f"{dev['name']} ({dev['hostapi']})"
-                self.device_combo.addItem(name, i) # Store index as data
-                if i == current_device_id:
-                    default_index = self.device_combo.count() - 1
-        
-        self.device_combo.setCurrentIndex(default_index)
+        # Populated from the cached device list; enumeration runs in the background
+        self.populate_devices(self.device_monitor.devices if self.device_monitor else [])
         self.device_combo.currentIndexChanged.connect(self.on_device_changed)
         layout.addWidget(self.device_combo)
+        if self.device_monitor:
+            self.device_monitor.devices_changed.connect(self.populate_devices)
+        
+        self.warm_check = QCheckBox("Keep microphone open (no clipped first word)")
+        self.warm_check.setChecked(self.config.get("keep_stream_open"))
+        self.warm_check.toggled.connect(lambda v: self.config.set("keep_stream_open", v))
+        self.warm_check.setStyleSheet("color: white;")
+        layout.addWidget(self.warm_check)
         
         layout.addStretch()
         widget.setLayout(layout)
         return widget
 
+    def populate_devices(self, devices):
+        current_device_id = self.config.get("input_device_id")
+        self.device_combo.blockSignals(True)
+        self.device_combo.clear()
+        self.device_combo.addItem("System Default", None)
+        default_index = 0
+        for i, name in devices:
+            self.device_combo.addItem(name, i) # Store index as data
+            if i == current_device_id:
+                default_index = self.device_combo.count() - 1
+        if current_device_id is not None and not devices:
+            # List not loaded yet: keep showing the configured device
+            self.device_combo.addItem(f"Device {current_device_id}", current_device_id)
+            default_index = 1
+        self.device_combo.setCurrentIndex(default_index)
+        self.device_combo.blockSignals(False)
+
+    def showEvent(self, event):
+        # Pick up devices plugged in since the last refresh
+        if self.device_monitor:
+            self.device_monitor.refresh()
+        super().showEvent(event)
+
     def on_device_changed(self, index):
         device_id = self.device_combo.currentData()
         self.config.set("input_device_id", device_id)
@@ -147,6 +185,51 @@ class SettingsDialog(QDialog):
         )
         layout.addWidget(self.lang_combo)
         
+        # Latency target: per-clip choice of model tier / beam size
+        layout.addWidget(QLabel("Latency Target:"))
+        self.latency_combo = QComboBox()
+        for label, ms in (("Off (fixed model)", 0), ("1 s", 1000), ("2 s", 2000), ("3 s", 3000), ("5 s", 5000)):
+            self.latency_combo.addItem(label, ms)
+        index = self.latency_combo.findData(self.config.get("latency_target_ms"))
+        self.latency_combo.setCurrentIndex(max(0, index))
+        self.latency_combo.currentIndexChanged.connect(
+            lambda i: self.config.set("latency_target_ms", self.latency_combo.itemData(i))
+        )
+        layout.addWidget(self.latency_combo)
+        
+        layout.addWidget(QLabel("Unload Model When Idle (min, 0 = never):"))
+        self.idle_spin = QSpinBox()
+        self.idle_spin.setRange(0, 1440)
+        self.idle_spin.setSingleStep(5)
+        self.idle_spin.setValue(self.config.get("model_idle_unload_min"))
+        self.idle_spin.valueChanged.connect(lambda v: self.config.set("model_idle_unload_min", v))
+        layout.addWidget(self.idle_spin)
+        
+        self.streaming_check = QCheckBox("Transcribe while recording (streaming)")
+        self.streaming_check.setChecked(self.config.get("streaming_mode"))
+        self.streaming_check.toggled.connect(lambda v: self.config.set("streaming_mode", v))
+        self.streaming_check.setStyleSheet("color: white;")
+        layout.addWidget(self.streaming_check)
+        
+        self.progressive_check = QCheckBox("Paste text as it is decoded")
+        self.progressive_check.setChecked(self.config.get("progressive_output"))
+        self.progressive_check.toggled.connect(lambda v: self.config.set("progressive_output", v))
+        self.progressive_check.setStyleSheet("color: white;")
+        layout.addWidget(self.progressive_check)
+        
+        self.punctuation_check = QCheckBox("Spoken punctuation (\"запятая\" → \",\")")
+        self.punctuation_check.setChecked(self.config.get("spoken_punctuation"))
+        self.punctuation_check.toggled.connect(lambda v: self.config.set("spoken_punctuation", v))
+        self.punctuation_check.setStyleSheet("color: white;")
+        layout.addWidget(self.punctuation_check)
+        
+        # Benchmarks compute type / threads / beam size on the last recording
+        calibrate_btn = QPushButton("Auto-tune Performance")
+        calibrate_btn.setToolTip("Finds the fastest settings for this PC using your last dictation")
+        calibrate_btn.clicked.connect(self.calibrate_requested.emit)
+        calibrate_btn.setStyleSheet("background: #555; color: white; padding: 6px 12px; border: none;")
+        layout.addWidget(calibrate_btn)
+        
         layout.addStretch()
         widget.setLayout(layout)
         return widget